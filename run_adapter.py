@@ -9,12 +9,15 @@ import sys
 
 from src.main_aicarus import main
 from src.logger import logger  # 现在可以尝试导入 Adapter 自己的 logger
+from src.utils import install_uvloop
 
 if __name__ == "__main__":
     logger.info("AIcarus Napcat Adapter v2.0.0 正在通过 run_adapter.py 启动...")
     try:
         import asyncio
 
+        if install_uvloop():
+            logger.info("已启用 uvloop 事件循环。")
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("程序被用户中断。")
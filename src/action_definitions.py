@@ -354,7 +354,7 @@ class RecallMessageHandler(BaseActionHandler):
         except ValueError:
             return False, f"无效的 message_id 格式: {target_message_id}", {}
         except Exception as e:
-            logger.error(f"执行撤回时出现异常: {e}", exc_info=True)
+            logger.opt(exception=True).error(f"执行撤回时出现异常: {e}")
             return False, f"执行撤回时出现异常: {e}", {}
 
 
@@ -412,7 +412,7 @@ class PokeUserHandler(BaseActionHandler):
                 {},
             )
         except Exception as e:
-            logger.error(f"执行戳一戳时出现异常: {e}", exc_info=True)
+            logger.opt(exception=True).error(f"执行戳一戳时出现异常: {e}")
             return False, f"执行戳一戳时出现异常: {e}", {}
 
 
@@ -454,7 +454,7 @@ class HandleFriendRequestHandler(BaseActionHandler):
                 )
                 return False, error_msg, {}
         except Exception as e:
-            logger.error(f"处理好友请求时出现异常: {e}", exc_info=True)
+            logger.opt(exception=True).error(f"处理好友请求时出现异常: {e}")
             return False, f"处理好友请求时出现异常: {e}", {}
 
 
@@ -506,7 +506,7 @@ class HandleGroupRequestHandler(BaseActionHandler):
                 )
                 return False, error_msg, {}
         except Exception as e:
-            logger.error(f"处理群请求时出现异常: {e}", exc_info=True)
+            logger.opt(exception=True).error(f"处理群请求时出现异常: {e}")
             return False, f"处理群请求时出现异常: {e}", {}
 
 
@@ -602,8 +602,8 @@ class GetBotProfileHandler(BaseActionHandler):
             return True, "成功获取机器人信息（包括所有群聊档案）", profile_data
 
         except Exception as e:
-            logger.error(
-                f"[{action_id}] 执行获取机器人信息时出现异常: {e}", exc_info=True
+            logger.opt(exception=True).error(
+                f"[{action_id}] 执行获取机器人信息时出现异常: {e}"
             )
             return False, f"执行获取机器人信息时出现异常: {e}", {}
 
@@ -814,7 +814,7 @@ class GetHistoryHandler(BaseActionHandler):
                     {},
                 )
         except Exception as e:
-            logger.error(f"调用历史消息API时出错: {e}", exc_info=True)
+            logger.opt(exception=True).error(f"调用历史消息API时出错: {e}")
             return False, f"调用历史消息API时出错: {e}", {}
 
         if raw_messages is None:
@@ -845,8 +845,8 @@ class GetHistoryHandler(BaseActionHandler):
                 converted_messages.append(converted_msg_dict)
 
             except Exception as e:
-                logger.error(
-                    f"转换一条历史消息时出错: {e}, 原始消息: {raw_msg}", exc_info=True
+                logger.opt(exception=True).error(
+                    f"转换一条历史消息时出错: {e}, 原始消息: {raw_msg}"
                 )
                 # 这条转换失败就跳过，不能因为一颗老鼠屎坏了一锅粥
 
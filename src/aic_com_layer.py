@@ -1,20 +1,39 @@
 # AIcarus Napcat Adapter - Communication Layer for Protocol v1.6.0
 # Adapter 作为客户端，连接到 Core WebSocket 服务器的通信层
-import time
 import asyncio
 import json
+import random
+import re
 import websockets  # type: ignore
 from websockets.exceptions import ConnectionClosed, InvalidURI, WebSocketException  # type: ignore
-from typing import Optional, Callable, Awaitable, Any, Dict
+from typing import Optional, Callable, Awaitable, Any, Dict, Union
 
 # 啊~ 导入我们全新的、没有platform字段的Event！
 from aicarus_protocols import Event, Seg, PROTOCOL_VERSION
-import uuid
 
 # 从同级目录导入
-from .logger import logger
+from .logger import logger, DEBUG_LOG_ENABLED, traceback_allowed
 from .config import get_config
-
+from .utils import (
+    dumps_json,
+    dumps_json_bytes,
+    loads_json,
+    install_uvloop,
+    new_event_id,
+    now_ms,
+)
+
+# 连接事件预序列化时占位用的值，每次连接时替换成真正的 event_id 和 time
+_CONNECT_EVENT_ID_SLOT = "__connect_event_id__"
+_CONNECT_EVENT_TIME_SLOT = "__connect_event_time__"
+
+# Core 下发的元事件（心跳回应之类）只需要看一眼 event_type 就能处理，
+# 在消息开头这一小段里用正则偷看一下，命中就不做完整的 JSON 解析
+_META_FRAME_PEEK_BYTES = 256
+_META_FRAME_RE = re.compile(r'"event_type"\s*:\s*"(meta\.[^"]*)"')
+
+# 写协程一批最多连续写这么多条，写完让出一次事件循环，免得突发流量时把别的协程饿着
+_WRITER_BATCH_MAX = 64
 
 # 定义从 Core 收到的消息的处理回调类型
 CoreEventCallback = Callable[[Dict[str, Any]], Awaitable[None]]
@@ -25,92 +44,140 @@ class CoreConnectionClient:
         self.adapter_config = get_config()
         self.core_ws_url: str = self.adapter_config.core_connection_url
         self.platform_id: str = self.adapter_config.core_platform_id
+        # 把 platform_id 之类的上下文一次性绑在 logger 上，日志格式里统一带出来，
+        # 不用每条日志都自己拼一遍
+        self.logger = logger.bind(
+            adapter_ctx=f"[{self.platform_id}] ",
+            platform_id=self.platform_id,
+            core_ws=self.core_ws_url,
+        )
         self.bot_id: str | None = None
         self.websocket: Optional[websockets.WebSocketClientProtocol] = None
         self._receive_task: Optional[asyncio.Task] = None
         self._heartbeat_task: Optional[asyncio.Task] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        # 所有要发给 Core 的消息先进这个队列，由唯一的写协程统一发出去
+        self._out_queue: asyncio.Queue[Union[str, bytes]] = asyncio.Queue(maxsize=1024)
+        # 打开后发给 Core 的消息直接用 UTF-8 bytes 走二进制帧，省掉 str 的编码和中间对象
+        # （需要 Core 那边也接受二进制帧）
+        self._binary_frames: bool = self.adapter_config.core_binary_frames
         self._is_running: bool = False
-        self._reconnect_delay: int = 5
+        # 重连间隔：指数退避 + 一点随机抖动，连上之后重新从最小值开始
+        self._reconnect_min: float = 0.5
+        self._reconnect_max: float = 30.0
+        self._reconnect_current: float = self._reconnect_min
+        # stop_communication 会 set 它，让正在等待重连的 run_forever 立刻醒过来
+        self._stop_event: asyncio.Event = asyncio.Event()
         self._on_event_from_core_callback: Optional[CoreEventCallback] = None
         self.heartbeat_interval: int = 30
+        # 连接（注册）事件只序列化一次，之后每次重连只替换 event_id 和 time 两个占位
+        self._connect_event_type: str = f"meta.{self.platform_id}.lifecycle.connect"
+        self._connect_event_json: str = dumps_json(
+            {
+                **self._build_connect_event_template(),
+                "event_id": _CONNECT_EVENT_ID_SLOT,
+                "time": _CONNECT_EVENT_TIME_SLOT,
+            }
+        )
+
+    def _build_connect_event_template(self) -> Dict[str, Any]:
+        """预先构造好连接（注册）事件，event_id 和 time 在每次连接时再填。"""
+        # --- ❤❤❤ 高潮点 #1: 初吻的改造！❤❤❤ ---
+        connect_event = Event(
+            event_id="",  # 每次连接时替换
+            event_type=self._connect_event_type,
+            time=0,  # 每次连接时替换
+            # platform 字段已被无情阉割！
+            bot_id=self.platform_id,  # bot_id 暂时用 platform_id 代替
+            user_info=None,
+            conversation_info=None,
+            content=[
+                Seg(
+                    type="meta.lifecycle",  # Seg的type保持不变，它只是内容的描述
+                    data={
+                        "lifecycle_type": "connect",
+                        "details": {
+                            "adapter_id": self.platform_id,
+                            "display_name": "Napcat QQ Adapter",
+                            "adapter_platform": "napcat",
+                            "adapter_version": "2.0.0",  # 版本号也更新一下
+                            "protocol_version": PROTOCOL_VERSION,
+                        },
+                    },
+                )
+            ],
+            raw_data=dumps_json(
+                {
+                    "source": "adapter_connection",
+                    "platform": self.platform_id,
+                }
+            ),
+        )
+        return connect_event.to_dict()
 
     def register_core_event_handler(self, callback: CoreEventCallback) -> None:
         """注册一个回调函数，用于处理从 Core 服务器收到的事件。"""
         self._on_event_from_core_callback = callback
-        logger.info(
+        self.logger.info(
             f"已为来自 Core 的事件注册处理回调: {callback.__name__ if hasattr(callback, '__name__') else callback}"
         )
 
     async def _connect(self) -> bool:
         """尝试连接到 Core WebSocket 服务器。"""
         if self.websocket and self.websocket.open:
-            logger.debug("已连接到 Core，无需重新连接。")
+            self.logger.debug("已连接到 Core，无需重新连接。")
             return True
         try:
-            logger.info(
-                f"正在尝试连接到 Core WebSocket 服务器: {self.core_ws_url} (Platform ID: {self.platform_id})"
+            self.logger.info(
+                f"正在尝试连接到 Core WebSocket 服务器: {self.core_ws_url}"
+            )
+            # Adapter 和 Core 之间的内部链路：不压缩（省掉每帧的 zlib 开销），
+            # 放宽单条消息和读写缓冲上限，免得大的动作结果被拒或被切碎
+            self.websocket = await websockets.connect(
+                self.core_ws_url,
+                compression=None,
+                max_size=8 * 1024 * 1024,
+                max_queue=64,
+                read_limit=2**20,
+                write_limit=2**20,
+                ping_interval=20,
+                ping_timeout=20,
             )
-            self.websocket = await websockets.connect(self.core_ws_url)
-            logger.info(f"已成功连接到 Core WebSocket 服务器: {self.core_ws_url}")
+            self.logger.info(f"已成功连接到 Core WebSocket 服务器: {self.core_ws_url}")
 
             adapter_id_for_registration = self.platform_id
-            logger.info(
+            self.logger.info(
                 f"准备向 Core 发送 meta.lifecycle.connect 事件 (同时用于注册)，Adapter ID: '{adapter_id_for_registration}'"
             )
 
-            # --- ❤❤❤ 高潮点 #1: 初吻的改造！❤❤❤ ---
-            connect_event_type = f"meta.{self.platform_id}.lifecycle.connect"
+            # 事件在 __init__ 里就已经序列化好了，每次重连只需要换上新的 ID 和时间
+            connect_event_json = self._connect_event_json.replace(
+                f'"{_CONNECT_EVENT_ID_SLOT}"', f'"{new_event_id("meta_connect")}"', 1
+            ).replace(f'"{_CONNECT_EVENT_TIME_SLOT}"', str(now_ms()), 1)
 
-            connect_event = Event(
-                event_id=f"meta_connect_{uuid.uuid4()}",
-                event_type=connect_event_type,  # 使用新的event_type
-                time=int(time.time() * 1000),
-                # platform 字段已被无情阉割！
-                bot_id=self.platform_id,  # bot_id 暂时用 platform_id 代替
-                user_info=None,
-                conversation_info=None,
-                content=[
-                    Seg(
-                        type="meta.lifecycle",  # Seg的type保持不变，它只是内容的描述
-                        data={
-                            "lifecycle_type": "connect",
-                            "details": {
-                                "adapter_id": adapter_id_for_registration,
-                                "display_name": "Napcat QQ Adapter",
-                                "adapter_platform": "napcat",
-                                "adapter_version": "2.0.0",  # 版本号也更新一下
-                                "protocol_version": PROTOCOL_VERSION,
-                            },
-                        },
-                    )
-                ],
-                raw_data=json.dumps(
-                    {
-                        "source": "adapter_connection",
-                        "platform": self.platform_id,
-                    }
-                ),
+            # 注册事件必须是连接上的第一条消息，所以不走发送队列，直接写出去
+            await self._send_payload(
+                connect_event_json.encode("utf-8")
+                if self._binary_frames
+                else connect_event_json
             )
-
-            await self.send_event_to_core(connect_event.to_dict())
-            logger.info(
-                f"已向 Core 发送 {connect_event_type} 事件 (Adapter ID: {adapter_id_for_registration})，此事件将用于注册。"
+            self.logger.info(
+                f"已向 Core 发送 {self._connect_event_type} 事件 (Adapter ID: {adapter_id_for_registration})，此事件将用于注册。"
             )
             return True
         except InvalidURI:
-            logger.critical(
+            self.logger.critical(
                 f"连接 Core 失败: 无效的 WebSocket URI '{self.core_ws_url}'"
             )
         except ConnectionRefusedError:
-            logger.error(f"连接 Core 失败 ({self.core_ws_url}): 连接被拒绝。")
+            self.logger.error(f"连接 Core 失败 ({self.core_ws_url}): 连接被拒绝。")
         except WebSocketException as e:
-            logger.error(
+            self.logger.opt(exception=True).error(
                 f"连接 Core ({self.core_ws_url}) 时发生 WebSocket 异常: {e}",
-                exc_info=True,
             )
         except Exception as e:
-            logger.error(
-                f"连接 Core ({self.core_ws_url}) 时发生未知错误: {e}", exc_info=True
+            self.logger.opt(exception=True).error(
+                f"连接 Core ({self.core_ws_url}) 时发生未知错误: {e}"
             )
 
         self.websocket = None
@@ -120,15 +187,13 @@ class CoreConnectionClient:
         """让外面的小妖精（RecvHandler）把获取到的 bot_id 注入进来的方法。"""
         if bot_id and self.bot_id != bot_id:
             self.bot_id = bot_id
-            logger.info(
+            self.logger.info(
                 f"通信层的 bot_id 已更新为: {bot_id}，现在心跳会带着它的味道了~"
             )
 
     async def _heartbeat_loop(self) -> None:
         """定期向 Core 发送心跳包。"""
-        logger.info(
-            f"心跳循环准备启动 (Adapter ID: {self.platform_id})，每 {self.heartbeat_interval} 秒发送一次。"
-        )
+        self.logger.info(f"心跳循环准备启动，每 {self.heartbeat_interval} 秒发送一次。")
         try:
             while self._is_running and self.websocket and self.websocket.open:
                 await asyncio.sleep(self.heartbeat_interval)
@@ -141,100 +206,126 @@ class CoreConnectionClient:
                 heartbeat_event_type = f"meta.{self.platform_id}.heartbeat"
 
                 heartbeat_event = Event(
-                    event_id=f"meta_heartbeat_{self.platform_id}_{uuid.uuid4().hex[:6]}",
+                    event_id=new_event_id(f"meta_heartbeat_{self.platform_id}"),
                     event_type=heartbeat_event_type,
-                    time=int(time.time() * 1000),
+                    time=now_ms(),
                     # platform 字段已被无情阉割！
                     bot_id=self.bot_id or self.platform_id,
                     content=[],
                 )
 
                 if not await self.send_event_to_core(heartbeat_event.to_dict()):
-                    logger.warning(
-                        "发送心跳包到 Core 失败。连接可能已断开，心跳循环将终止。"
+                    self.logger.warning(
+                        "发送心跳包到 Core 失败（连接已断开或发送队列已满），心跳循环将终止。"
                     )
                     break
         except asyncio.CancelledError:
-            logger.info(f"心跳循环被取消 (Adapter ID: {self.platform_id}).")
+            self.logger.info("心跳循环被取消。")
         except Exception as e_outer:
-            logger.error(
-                f"心跳循环意外终止 (Adapter ID: {self.platform_id}): {e_outer}",
-                exc_info=True,
+            self.logger.opt(exception=True).error(
+                f"心跳循环意外终止: {e_outer}",
             )
         finally:
-            logger.info(f"心跳循环已停止 (Adapter ID: {self.platform_id}).")
+            self.logger.info("心跳循环已停止。")
+
+    def _peek_meta_event_type(self, message: Union[str, bytes]) -> Optional[str]:
+        """只看消息开头，如果是 meta.* 元事件就返回它的 event_type，否则返回 None。"""
+        head = message[:_META_FRAME_PEEK_BYTES]
+        if isinstance(head, bytes):
+            head = head.decode("utf-8", "ignore")
+        match = _META_FRAME_RE.search(head)
+        return match.group(1) if match else None
+
+    def _handle_meta_fast(self, meta_event_type: str) -> None:
+        """元事件不是给 send_handler 执行的动作，记一笔就丢掉，不用解析也不用回应。"""
+        if DEBUG_LOG_ENABLED:
+            self.logger.debug(
+                "收到来自 Core 的元事件 {}，已走快速通道跳过解析。", meta_event_type
+            )
 
     async def _receive_loop(self) -> None:
         """持续接收来自 Core 的消息，并在收到消息时调用回调。"""
-        logger.info(f"消息接收循环准备启动 (Adapter ID: {self.platform_id}).")
+        self.logger.info("消息接收循环准备启动。")
+        # 直接 async for 迭代连接：正常关闭时迭代自然结束，异常关闭时抛 ConnectionClosed，
+        # 不用每轮都去查 .open，也省掉手写 recv() 循环的那层开销
+        ws = self.websocket
+        if ws is None:
+            return
         try:
-            while self._is_running and self.websocket and self.websocket.open:
+            # websockets 12 对文本帧给 str、对二进制帧给 bytes，这里原样往下传：
+            # 元事件偷看和各个解析路径都能直接吃这两种，不在这里多做一次编解码
+            async for message_str in ws:
+                if not self._is_running:
+                    break
+                if DEBUG_LOG_ENABLED:
+                    preview = message_str[:200]
+                    if isinstance(preview, bytes):
+                        preview = preview.decode("utf-8", "replace")
+                    self.logger.debug("从 Core 收到消息: {}...", preview)
+                meta_event_type = self._peek_meta_event_type(message_str)
+                if meta_event_type is not None:
+                    self._handle_meta_fast(meta_event_type)
+                    continue
                 try:
-                    message_str = await self.websocket.recv()
-                    logger.debug(f"从 Core 收到消息: {message_str[:200]}...")
-                    try:
-                        event_dict = json.loads(message_str)
-                        # logger.info(f"接收到来自 Core 的事件内容: {event_dict}") # 日志可能过于频繁
-                        if self._on_event_from_core_callback:
-                            await self._on_event_from_core_callback(event_dict)
-                        else:
-                            logger.warning("收到来自 Core 的事件，但没有注册处理回调。")
-                    except json.JSONDecodeError:
-                        logger.error(f"从 Core 解码 JSON 失败: {message_str}")
-                    except Exception as e_proc:
-                        logger.error(
-                            f"处理来自 Core 的事件时出错: {e_proc}", exc_info=True
+                    event_dict = loads_json(message_str)
+                    # self.logger.info(f"接收到来自 Core 的事件内容: {event_dict}") # 日志可能过于频繁
+                    if self._on_event_from_core_callback:
+                        await self._on_event_from_core_callback(event_dict)
+                    else:
+                        self.logger.warning(
+                            "收到来自 Core 的事件，但没有注册处理回调。"
                         )
-                except ConnectionClosed:
-                    logger.warning(
-                        "与 Core 的 WebSocket 连接已关闭 (在recv中检测到)。将尝试重连。"
+                except json.JSONDecodeError:
+                    self.logger.error(f"从 Core 解码 JSON 失败: {message_str}")
+                except Exception as e_proc:
+                    self.logger.opt(exception=traceback_allowed()).error(
+                        "处理来自 Core 的事件时出错: {}", e_proc
                     )
-                    break
-                except WebSocketException as e_ws_recv:  # 更具体的WebSocket异常
-                    logger.error(
-                        f"接收来自 Core 的消息时发生 WebSocket 异常: {e_ws_recv}",
-                        exc_info=True,
-                    )
-                    break
-                except Exception as e_recv:  # 其他未知错误
-                    logger.error(
-                        f"接收来自 Core 的消息时发生未知错误: {e_recv}", exc_info=True
-                    )
-                    await asyncio.sleep(self._reconnect_delay / 2.0)
-                    break
+            if self._is_running:
+                self.logger.warning("与 Core 的 WebSocket 连接已关闭。将尝试重连。")
+        except ConnectionClosed:
+            self.logger.warning(
+                "与 Core 的 WebSocket 连接已关闭 (在recv中检测到)。将尝试重连。"
+            )
+        except WebSocketException as e_ws_recv:  # 更具体的WebSocket异常
+            self.logger.opt(exception=True).error(
+                f"接收来自 Core 的消息时发生 WebSocket 异常: {e_ws_recv}",
+            )
         except asyncio.CancelledError:
-            logger.info(f"消息接收循环被取消 (Adapter ID: {self.platform_id}).")
+            self.logger.info("消息接收循环被取消。")
         except Exception as e_outer_recv:
-            logger.error(
-                f"消息接收循环意外终止 (Adapter ID: {self.platform_id}): {e_outer_recv}",
-                exc_info=True,
+            self.logger.opt(exception=True).error(
+                f"消息接收循环意外终止: {e_outer_recv}",
             )
         finally:
-            logger.info(f"消息接收循环已停止 (Adapter ID: {self.platform_id}).")
+            self.logger.info("消息接收循环已停止。")
 
     async def run_forever(self) -> None:
         """启动并永久运行与 Core 的连接，包括自动重连。"""
         if not self._on_event_from_core_callback:
-            logger.error("Core 事件处理回调未注册，无法启动与 Core 的通信。")
+            self.logger.error("Core 事件处理回调未注册，无法启动与 Core 的通信。")
             return
 
         self._is_running = True
-        logger.info(f"启动与 AIcarus Core 的通信层 (Adapter ID: {self.platform_id})...")
+        self._stop_event.clear()
+        self.logger.info("启动与 AIcarus Core 的通信层...")
         while self._is_running:
             if await self._connect():
+                self._reconnect_current = self._reconnect_min
                 self._receive_task = asyncio.create_task(
                     self._receive_loop(), name=f"ReceiveTask-{self.platform_id}"
                 )
                 self._heartbeat_task = asyncio.create_task(
                     self._heartbeat_loop(), name=f"HeartbeatTask-{self.platform_id}"
                 )
-
-                logger.info(
-                    f"消息接收和心跳任务已启动 for Adapter ID: {self.platform_id}"
+                self._writer_task = asyncio.create_task(
+                    self._writer_loop(), name=f"WriterTask-{self.platform_id}"
                 )
 
+                self.logger.info("消息接收、发送和心跳任务已启动")
+
                 done, pending = await asyncio.wait(
-                    [self._receive_task, self._heartbeat_task],
+                    [self._receive_task, self._heartbeat_task, self._writer_task],
                     return_when=asyncio.FIRST_COMPLETED,
                 )
 
@@ -244,33 +335,32 @@ class CoreConnectionClient:
                         try:
                             await task
                         except asyncio.CancelledError:
-                            logger.debug(
+                            self.logger.debug(
                                 f"任务 {task.get_name()} 在等待完成时被成功取消。"
                             )
                         except Exception as e_pending_await:
-                            logger.error(
+                            self.logger.opt(exception=True).error(
                                 f"等待挂起任务 {task.get_name()} 完成时发生错误: {e_pending_await}",
-                                exc_info=True,
                             )
 
                 for task in done:
                     try:
                         task.result()
-                        logger.info(f"任务 {task.get_name()} 已完成。")
+                        self.logger.info(f"任务 {task.get_name()} 已完成。")
                     except asyncio.CancelledError:
-                        logger.info(f"任务 {task.get_name()} 被取消。")
+                        self.logger.info(f"任务 {task.get_name()} 被取消。")
                     except WebSocketException as e_ws_done:
-                        logger.warning(
+                        self.logger.warning(
                             f"任务 {task.get_name()} 因WebSocket异常结束: {e_ws_done}"
                         )
                     except Exception as e_task_done:
-                        logger.error(
+                        self.logger.opt(exception=True).error(
                             f"任务 {task.get_name()} 异常结束: {e_task_done}",
-                            exc_info=True,
                         )
 
                 self._receive_task = None
                 self._heartbeat_task = None
+                self._writer_task = None
 
                 if self.websocket:
                     try:
@@ -278,62 +368,74 @@ class CoreConnectionClient:
                     except Exception:
                         pass
                     self.websocket = None
-                logger.info(
-                    f"与 Core 的连接已断开或相关任务已停止 for Adapter ID: {self.platform_id}."
-                )
+                # 连接已经没了，还没发出去的消息（旧心跳、动作响应）不能留到下一条连接上补发
+                discarded = self._discard_out_queue()
+                if discarded:
+                    self.logger.warning(
+                        "连接已断开，丢弃发送队列中尚未发出的 {} 条消息。", discarded
+                    )
+                self.logger.info("与 Core 的连接已断开或相关任务已停止。")
 
             if self._is_running:
-                logger.info(
-                    f"与 Core 的连接已断开，将在 {self._reconnect_delay} 秒后尝试重连 (Adapter ID: {self.platform_id})..."
+                reconnect_delay = self._reconnect_current + random.uniform(0, 0.5)
+                self._reconnect_current = min(
+                    self._reconnect_max, self._reconnect_current * 2
                 )
-                await asyncio.sleep(self._reconnect_delay)
-            else:
-                logger.info(
-                    f"Core 通信层被外部信号停止，不再重连 (Adapter ID: {self.platform_id})."
+                self.logger.info(
+                    f"与 Core 的连接已断开，将在 {reconnect_delay:.1f} 秒后尝试重连..."
                 )
+                try:
+                    await asyncio.wait_for(
+                        self._stop_event.wait(), timeout=reconnect_delay
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                self.logger.info("Core 通信层被外部信号停止，不再重连。")
                 break
-        logger.info(
-            f"与 AIcarus Core 的通信层已停止运行 (Adapter ID: {self.platform_id})."
-        )
+        self.logger.info("与 AIcarus Core 的通信层已停止运行。")
 
     async def stop_communication(self) -> None:
         """停止与 Core 的通信并关闭连接。"""
-        logger.info(f"正在停止与 Core 的通信 (Adapter ID: {self.platform_id})...")
+        self.logger.info("正在停止与 Core 的通信...")
         self._is_running = False
+        self._stop_event.set()
 
         tasks_to_cancel = []
         if self._receive_task and not self._receive_task.done():
             tasks_to_cancel.append(self._receive_task)
         if self._heartbeat_task and not self._heartbeat_task.done():
             tasks_to_cancel.append(self._heartbeat_task)
+        if self._writer_task and not self._writer_task.done():
+            tasks_to_cancel.append(self._writer_task)
 
         for task in tasks_to_cancel:
             task.cancel()
             try:
                 await task
             except asyncio.CancelledError:
-                logger.debug(f"任务 {task.get_name()} 在停止时已成功取消。")
+                self.logger.debug(f"任务 {task.get_name()} 在停止时已成功取消。")
             except Exception as e_cancel_task:
-                logger.error(
+                self.logger.opt(exception=True).error(
                     f"等待任务 {task.get_name()} 取消时发生错误: {e_cancel_task}",
-                    exc_info=True,
                 )
 
         self._receive_task = None
         self._heartbeat_task = None
+        self._writer_task = None
 
         if self.websocket and self.websocket.open:
             try:
                 # --- ❤❤❤ 高潮点 #3: 告别之吻的改造！❤❤❤ ---
-                logger.info(
+                self.logger.info(
                     f"Adapter ({self.platform_id}) 准备主动断开连接，将发送 meta.lifecycle.disconnect 事件。"
                 )
                 disconnect_event_type = f"meta.{self.platform_id}.lifecycle.disconnect"
 
                 disconnect_event = Event(
-                    event_id=f"meta_disconnect_{self.platform_id}_{uuid.uuid4().hex[:6]}",
+                    event_id=new_event_id(f"meta_disconnect_{self.platform_id}"),
                     event_type=disconnect_event_type,
-                    time=int(time.time() * 1000),
+                    time=now_ms(),
                     # platform 字段已被无情阉割！
                     bot_id=self.platform_id,
                     content=[
@@ -349,27 +451,30 @@ class CoreConnectionClient:
                         )
                     ],
                 )
-                await self.send_event_to_core(disconnect_event.to_dict())
-                logger.info(
-                    f"已向 Core 发送 {disconnect_event_type} 事件 (adapter_id: {self.platform_id})."
-                )
+                # 写协程已经停了，告别事件直接写出去
+                await self._send_event_directly(disconnect_event.to_dict())
+                self.logger.info(f"已向 Core 发送 {disconnect_event_type} 事件。")
                 await asyncio.sleep(0.1)
 
                 if self.websocket and self.websocket.open:
-                    logger.info("正在关闭与 Core 的 WebSocket 连接...")
+                    self.logger.info("正在关闭与 Core 的 WebSocket 连接...")
                     await self.websocket.close(
                         code=1000, reason="Adapter shutting down"
                     )
-                    logger.info("与 Core 的 WebSocket 连接已关闭。")
+                    self.logger.info("与 Core 的 WebSocket 连接已关闭。")
                 else:
-                    logger.info("WebSocket 连接在尝试显式关闭前已关闭或变为None。")
+                    self.logger.info("WebSocket 连接在尝试显式关闭前已关闭或变为None。")
             except Exception as e_close:
-                logger.error(
+                self.logger.opt(exception=True).error(
                     f"关闭与 Core 的 WebSocket 连接或发送断开事件时发生错误: {e_close}",
-                    exc_info=True,
                 )
         self.websocket = None
-        logger.info(f"与 Core 的通信已完全停止 (Adapter ID: {self.platform_id}).")
+        discarded = self._discard_out_queue()
+        if discarded:
+            self.logger.warning(
+                "通信已停止，丢弃发送队列中尚未发出的 {} 条消息。", discarded
+            )
+        self.logger.info("与 Core 的通信已完全停止。")
 
     def _get_simplified_event_description(self, event_dict: Dict[str, Any]) -> str:
         """获取事件的简化描述，用于日志显示"""
@@ -435,32 +540,128 @@ class CoreConnectionClient:
         except Exception as e:
             return f"事件解析错误: {e}"
 
-    async def send_event_to_core(self, event_dict: Dict[str, Any]) -> bool:
-        if not self.websocket or not self.websocket.open:
-            logger.warning("无法发送事件给 Core：未连接或连接已关闭。")
-            return False
+    def _serialize_event(
+        self, event_dict: Dict[str, Any]
+    ) -> Optional[Union[str, bytes]]:
+        """把事件序列化成 JSON，顺便打一条简化日志。序列化失败返回 None。"""
         try:
-            event_json = json.dumps(event_dict, ensure_ascii=False)
-            simplified_desc = self._get_simplified_event_description(event_dict)
-            logger.info(f"发送事件到 Core: {simplified_desc}")
-            logger.debug(f"完整事件内容: {event_json}")
-            await self.websocket.send(event_json)
-            logger.debug("成功发送事件给 Core")
-            return True
+            event_json = (
+                dumps_json_bytes(event_dict)
+                if self._binary_frames
+                else dumps_json(event_dict)
+            )
         except TypeError as e_json:
-            logger.error(
+            self.logger.opt(exception=True).error(
                 f"序列化发送给 Core 的事件时出错: {e_json}. 事件内容: {event_dict}",
-                exc_info=True,
             )
-            return False
+            return None
+        # 简化描述要遍历整条消息，交给 loguru 懒求值，级别被过滤时就不算了
+        self.logger.opt(lazy=True).info(
+            "发送事件到 Core: {}",
+            lambda: self._get_simplified_event_description(event_dict),
+        )
+        if DEBUG_LOG_ENABLED:
+            self.logger.debug("完整事件内容: {}", event_json)
+        return event_json
+
+    async def _send_payload(self, payload: Union[str, bytes]) -> bool:
+        """把已经序列化好的消息真正写到 WebSocket 上。"""
+        try:
+            await self.websocket.send(payload)
+            if DEBUG_LOG_ENABLED:
+                self.logger.debug("成功发送事件给 Core")
+            return True
         except WebSocketException as e_ws:
-            logger.error(
-                f"通过 WebSocket 发送事件给 Core 时出错: {e_ws}", exc_info=True
+            self.logger.opt(exception=True).error(
+                f"通过 WebSocket 发送事件给 Core 时出错: {e_ws}"
             )
             return False
         except Exception as e:
-            logger.error(f"发送事件给 Core 时发生未知错误: {e}", exc_info=True)
+            self.logger.opt(exception=True).error(
+                f"发送事件给 Core 时发生未知错误: {e}"
+            )
+            return False
+
+    async def _send_event_directly(self, event_dict: Dict[str, Any]) -> bool:
+        """绕过发送队列直接发送，只给连接注册和主动断开这种必须立刻发出的事件用。"""
+        if not self.websocket or not self.websocket.open:
+            self.logger.warning("无法发送事件给 Core：未连接或连接已关闭。")
             return False
+        event_json = self._serialize_event(event_dict)
+        if event_json is None:
+            return False
+        return await self._send_payload(event_json)
+
+    async def send_event_to_core(self, event_dict: Dict[str, Any]) -> bool:
+        """序列化事件并放进发送队列，真正的写操作由 _writer_loop 完成。
+
+        返回 True 只表示已经排进队列，不代表 Core 已经收到；返回值的含义同 send_payload_to_core。
+        """
+        if self.websocket is None or not self.websocket.open:
+            self.logger.warning("无法发送事件给 Core：未连接或连接已关闭。")
+            return False
+        event_json = self._serialize_event(event_dict)
+        if event_json is None:
+            return False
+        return await self.send_payload_to_core(event_json)
+
+    async def send_payload_to_core(self, payload: Union[str, bytes]) -> bool:
+        """把已经序列化好的消息放进发送队列。同一份消息要发多次时，先序列化一次再反复调这个。
+
+        返回 True 表示已经排进队列，之后由写协程发出去；真正写失败时写协程会丢掉积压的消息并触发重连，
+        不会再通知调用方。返回 False 表示当前没有可用连接，或者队列已满，这条消息被直接丢弃。
+        """
+        # 连接已经断了就别排队了，不然这些消息会在下一条连接上被补发出去
+        if self.websocket is None or not self.websocket.open:
+            self.logger.warning("无法发送消息给 Core：未连接或连接已关闭。")
+            return False
+        # 不在这里等队列腾位置：写协程卡住或正在重连时，调用方会被一直挂住
+        try:
+            self._out_queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            self.logger.warning(
+                "发送队列已满（{} 条），这条发给 Core 的消息被丢弃。",
+                self._out_queue.maxsize,
+            )
+            return False
+        return True
+
+    def _discard_out_queue(self) -> int:
+        """把发送队列里还没发出去的消息全部丢掉，返回丢了几条。连接断开时调用，免得旧消息被发到新连接上。"""
+        discarded = 0
+        while True:
+            try:
+                self._out_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return discarded
+            discarded += 1
+
+    async def _writer_loop(self) -> None:
+        """唯一的写协程：取出队列里攒着的所有消息，一口气连续写给 Core。"""
+        self.logger.info("消息发送循环准备启动。")
+        try:
+            while self._is_running:
+                batch = [await self._out_queue.get()]
+                while len(batch) < _WRITER_BATCH_MAX and not self._out_queue.empty():
+                    batch.append(self._out_queue.get_nowait())
+                for sent_count, payload in enumerate(batch):
+                    if not await self._send_payload(payload):
+                        # 本批从写失败的这条开始都没发出去，队列里积压的也一起丢掉，不留到下一条连接
+                        backlog = self._discard_out_queue()
+                        self.logger.warning(
+                            "写入 Core 失败，丢弃本批未发出的 {} 条和队列中积压的 {} 条消息，将尝试重连。",
+                            len(batch) - sent_count,
+                            backlog,
+                        )
+                        return
+        except asyncio.CancelledError:
+            self.logger.info("消息发送循环被取消。")
+        except Exception as e_outer_send:
+            self.logger.opt(exception=True).error(
+                f"消息发送循环意外终止: {e_outer_send}",
+            )
+        finally:
+            self.logger.info("消息发送循环已停止。")
 
 
 core_connection_client = CoreConnectionClient()
@@ -489,12 +690,11 @@ if __name__ == "__main__":
         if core_connection_client.websocket and core_connection_client.websocket.open:
             logger.info("测试：Adapter 尝试发送一条事件给 Core...")
             from aicarus_protocols import Event, SegBuilder
-            import uuid
 
             test_event_to_core = Event(
-                event_id=f"test_msg_{uuid.uuid4()}",
+                event_id=new_event_id("test_msg"),
                 event_type="message.private.friend",
-                time=int(time.time() * 1000),
+                time=now_ms(),
                 platform=get_config().core_platform_id,
                 bot_id="test_bot_from_adapter",
                 user_info=None,
@@ -502,7 +702,7 @@ if __name__ == "__main__":
                 content=[
                     SegBuilder.text("你好，Core！来自 Adapter 的测试消息 (v2.0.0)。")
                 ],
-                raw_data=json.dumps({"source": "adapter_test", "test": True}),
+                raw_data=dumps_json({"source": "adapter_test", "test": True}),
             )
             await core_connection_client.send_event_to_core(
                 test_event_to_core.to_dict()
@@ -520,4 +720,5 @@ if __name__ == "__main__":
                 logger.info("通信任务已取消。")
         logger.info("--- Core 通信层客户端测试结束 ---")
 
+    install_uvloop()
     asyncio.run(main_test())
@@ -29,6 +29,9 @@ except ImportError:
         def exception(self, msg: str):
             print(f"EXCEPTION (config.py): {msg}")
 
+        def opt(self, **kwargs: Any) -> "FallbackLogger":
+            return self
+
     logger = FallbackLogger()  # type: ignore
 
 # --- 路径定义 ---
@@ -53,9 +56,14 @@ class AdapterConfigData:
     adapter_server_port: int = 8095
     core_connection_url: str = "ws://127.0.0.1:8000/ws"
     core_platform_id: str = "napcat_adapter_default_instance"
+    core_binary_frames: bool = False
     bot_nickname: str = ""
     force_self_id: str = ""  # 新增: 强制指定的机器人QQ号
     napcat_heartbeat_interval_seconds: int = 30
+    group_info_cache_ttl_seconds: float = 300.0
+    member_info_cache_ttl_seconds: float = 300.0
+    info_cache_max_entries: int = 4096
+    fetch_image_base64: bool = True
 
     def __init__(
         self, data: Union[Dict[str, Any], tomlkit.TOMLDocument]
@@ -78,6 +86,9 @@ class AdapterConfigData:
         self.core_platform_id = str(
             core_connection_settings.get("platform_id", self.core_platform_id)
         )
+        self.core_binary_frames = bool(
+            core_connection_settings.get("binary_frames", self.core_binary_frames)
+        )
 
         bot_settings_data = data.get("bot_settings", {})
         self.bot_nickname = str(bot_settings_data.get("nickname", self.bot_nickname))
@@ -91,6 +102,26 @@ class AdapterConfigData:
             )
         )
 
+        cache_settings = data.get("cache", {})
+        self.group_info_cache_ttl_seconds = float(
+            cache_settings.get(
+                "group_info_ttl_seconds", self.group_info_cache_ttl_seconds
+            )
+        )
+        self.member_info_cache_ttl_seconds = float(
+            cache_settings.get(
+                "member_info_ttl_seconds", self.member_info_cache_ttl_seconds
+            )
+        )
+        self.info_cache_max_entries = int(
+            cache_settings.get("info_max_entries", self.info_cache_max_entries)
+        )
+
+        image_settings = data.get("image", {})
+        self.fetch_image_base64 = bool(
+            image_settings.get("fetch_base64", self.fetch_image_base64)
+        )
+
         # 示例：如果未来模板增加了新的配置段或键，可以在这里安全地获取
         # new_section = data.get("another_section", {})
         # self.new_setting = str(new_section.get("new_setting", "default_value_if_not_in_class"))
@@ -193,7 +224,7 @@ def _handle_config_file_and_version() -> bool:
             logger.info(config_action_message)
             return True  # 新创建，需要用户检查
         except Exception as e:
-            logger.critical(f"从模板复制配置文件失败: {e}", exc_info=True)
+            logger.opt(exception=True).critical(f"从模板复制配置文件失败: {e}")
             sys.exit(1)  # 复制失败是致命错误
 
     # 实际配置文件存在，进行版本检查
@@ -201,7 +232,9 @@ def _handle_config_file_and_version() -> bool:
         actual_doc_str = ACTUAL_CONFIG_PATH.read_text(encoding="utf-8")
         actual_doc = tomlkit.parse(actual_doc_str)
     except Exception as e:
-        logger.error(f"解析现有配置文件 {ACTUAL_CONFIG_PATH} 失败: {e}", exc_info=True)
+        logger.opt(exception=True).error(
+            f"解析现有配置文件 {ACTUAL_CONFIG_PATH} 失败: {e}"
+        )
         backup_path = (
             BACKUP_DIR
             / f"{ACTUAL_CONFIG_PATH.name}_corrupted_{Path.cwd().name}_{os.getpid()}_{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}.toml"
@@ -264,8 +297,8 @@ def _handle_config_file_and_version() -> bool:
         logger.info(config_action_message.replace("\n", " "))
         return True  # 更新完成，需要用户检查
     except Exception as e_write:
-        logger.critical(
-            f"写入更新后的配置文件 {ACTUAL_CONFIG_PATH} 失败: {e_write}", exc_info=True
+        logger.opt(exception=True).critical(
+            f"写入更新后的配置文件 {ACTUAL_CONFIG_PATH} 失败: {e_write}"
         )
         logger.critical(
             "程序将使用更新前的配置（如果已加载），或者可能无法正确运行。请检查文件权限和磁盘空间。"
@@ -326,12 +359,12 @@ def load_and_get_config() -> AdapterConfigData:
 
         return _global_config_instance
     except tomlkit.exceptions.TOMLKitError as e:
-        logger.critical(
-            f"解析 Adapter 配置文件 {ACTUAL_CONFIG_PATH} 失败: {e}", exc_info=True
+        logger.opt(exception=True).critical(
+            f"解析 Adapter 配置文件 {ACTUAL_CONFIG_PATH} 失败: {e}"
         )
         raise SystemExit(f"配置文件错误，程序无法启动: {e}") from e
     except Exception as e:
-        logger.critical(f"加载 Adapter 配置时发生未知错误: {e}", exc_info=True)
+        logger.opt(exception=True).critical(f"加载 Adapter 配置时发生未知错误: {e}")
         raise SystemExit(f"配置加载错误，程序无法启动: {e}") from e
 
 
@@ -1,9 +1,18 @@
 # aicarus_napcat_adapter/src/event_definitions.py (小色猫·绝对统治版)
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, TYPE_CHECKING
-import uuid
-import json
-import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+)
+import sys
 import asyncio
 
 # 啊~ 看看我们全新的、不带platform字段的性感尤物们！
@@ -13,21 +22,128 @@ from aicarus_protocols import (
     ConversationInfo,
     Seg,
 )
-from .napcat_definitions import MetaEventType, MessageType, NoticeType
-from .config import get_config
+from .napcat_definitions import MetaEventType, MessageType, NoticeType, RequestType
 from .logger import logger
+from .utils import dumps_json, new_event_id, now_ms, qq_id_str
+from . import message_queue
 
 if TYPE_CHECKING:
     from .recv_handler_aicarus import RecvHandlerAicarus
 
 
+async def _noop() -> None:
+    """asyncio.gather 里占位用的，某个查询不需要做的时候就放它。"""
+    return None
+
+
+@lru_cache(maxsize=512)
+def _event_type(kind: str, platform_id: str, *parts: str) -> str:
+    """拼 "kind.platform_id.xxx" 形式的 event_type。
+
+    一共就那么几十种，拼好 intern 一次就记住：下游拿它当 dict key 的时候能直接按身份比较，
+    同一种事件也不用每条都重新拼字符串。
+    """
+    return sys.intern(".".join((kind, platform_id) + parts))
+
+
+def _event_time_ms(napcat_event: Dict[str, Any]) -> int:
+    """Napcat 给的是秒，换成毫秒；没给才去读现在的时间（别用 get 的默认值，那样每次都会白调一次取时间）。"""
+    napcat_time = napcat_event.get("time")
+    return napcat_time * 1000 if napcat_time is not None else now_ms()
+
+
+def _build_event(
+    kind: str,
+    event_type: str,
+    napcat_event: Dict[str, Any],
+    bot_id: str,
+    content: List[Seg],
+    user_info: Optional[UserInfo] = None,
+    conversation_info: Optional[ConversationInfo] = None,
+    raw_json: Optional[str] = None,
+) -> Event:
+    """四个工厂共用的 Event 组装：ID、时间和 raw_data 的规矩都在这一个地方。
+
+    raw_json 是 Napcat 发来的那一帧原文，有的话直接当 raw_data 用，省得把 napcat_event 再序列化一遍。
+    """
+    return Event(
+        event_id=new_event_id(kind),
+        event_type=event_type,
+        time=_event_time_ms(napcat_event),
+        bot_id=bot_id,
+        user_info=user_info,
+        conversation_info=conversation_info,
+        content=content,
+        raw_data=raw_json if raw_json is not None else dumps_json(napcat_event),
+    )
+
+
+def _known_bot_id(
+    napcat_event: Dict[str, Any], recv_handler: "RecvHandlerAicarus"
+) -> Optional[str]:
+    """不用等待就能拿到的 Bot ID：先看事件里的 self_id，再看已经发布的那个。都没有返回 None。"""
+    # 注意不能写成 str(self_id) or ...：str(None) 是 "None"，后面的兜底永远走不到
+    self_id = napcat_event.get("self_id")
+    if self_id is not None:
+        return qq_id_str(self_id)
+    return recv_handler.napcat_bot_id
+
+
+async def _resolve_bot_id(recv_handler: "RecvHandlerAicarus") -> str:
+    """冷启动兜底：手上还没有 Bot ID 时才去问 Napcat。"""
+    return await recv_handler._get_bot_id() or "unknown_bot"
+
+
+def _user_info_dict(user_info: Optional[UserInfo]) -> Optional[Dict[str, Any]]:
+    """通知内容里放的是普通 dict，没有用户信息就是 None。"""
+    return user_info.to_dict() if user_info else None
+
+
+# 这些通知会带上操作者的信息，需要额外查一次操作者
+_NOTICE_TYPES_WITH_OPERATOR = (
+    NoticeType.group_decrease,
+    NoticeType.group_increase,
+    NoticeType.group_ban,
+    NoticeType.group_recall,
+    NoticeType.friend_recall,
+)
+
+
+@dataclass
+class _NoticeContext:
+    """一条通知在分派给各个“小化妆师”之前，已经准备好的东西。"""
+
+    napcat_event: Dict[str, Any]
+    recv_handler: "RecvHandlerAicarus"
+    group_id: Optional[str]
+    user_info: Optional[UserInfo]  # 戳一戳会把它换成发起者
+    operator: Optional[UserInfo]
+
+
+# 加群请求的 sub_type -> event_type 后缀
+_GROUP_REQUEST_SUFFIXES: Dict[str, str] = {
+    "add": "conversation.join_application",
+    "invite": "conversation.invitation",
+}
+
+# (event_type 后缀, 内容数据)；None 表示这个类型不归它管，按通用通知处理
+_NoticeBuildResult = Optional[Tuple[str, Dict[str, Any]]]
+# 通知的“小化妆师”：拿到准备好的 _NoticeContext，返回上面那种结果
+_NoticeBuilder = Callable[
+    ["NoticeEventFactory", "_NoticeContext"], Awaitable[_NoticeBuildResult]
+]
+
+
 # --- “化妆间”：定义各种事件的构造工厂 ---
 class BaseEventFactory(ABC):
     """所有事件“化妆师”的基类，她们都得会“创造”这门手艺"""
 
     @abstractmethod
     async def create_event(
-        self, napcat_event: Dict[str, Any], recv_handler: "RecvHandlerAicarus"
+        self,
+        napcat_event: Dict[str, Any],
+        recv_handler: "RecvHandlerAicarus",
+        raw_json: Optional[str] = None,
     ) -> Optional[Event]:
         """根据原始的Napcat数据，创造一个性感又标准的AIcarus事件"""
         pass
@@ -37,15 +153,17 @@ class MessageEventFactory(BaseEventFactory):
     """专门负责构造“消息事件”的化妆师，手法最细腻，活儿最好"""
 
     async def create_event(
-        self, napcat_event: Dict[str, Any], recv_handler: "RecvHandlerAicarus"
+        self,
+        napcat_event: Dict[str, Any],
+        recv_handler: "RecvHandlerAicarus",
+        raw_json: Optional[str] = None,
     ) -> Optional[Event]:
-        bot_id = (
-            str(napcat_event.get("self_id"))
-            or await recv_handler._get_bot_id()
-            or "unknown_bot"
+        # 几乎每个事件都带 self_id，同步取到就不用多建一个协程
+        bot_id = _known_bot_id(napcat_event, recv_handler) or await _resolve_bot_id(
+            recv_handler
         )
         # --- ❤❤❤ 高潮点 #1: 从配置中取出我们神圣的平台ID！❤❤❤ ---
-        platform_id = recv_handler.global_config.core_platform_id
+        platform_id = recv_handler.platform_id
 
         napcat_message_type = napcat_event.get("message_type")
         napcat_sub_type = napcat_event.get("sub_type")
@@ -53,15 +171,27 @@ class MessageEventFactory(BaseEventFactory):
         napcat_sender = napcat_event.get("sender", {})
 
         # --- ❤❤❤ 高潮点 #2: 动态拼接全新的、带有性感烙印的 event_type！❤❤❤ ---
-        event_type_suffix = "unknown"  # 默认的后缀
+        event_type_parts: Tuple[str, ...] = ("unknown",)  # 默认的后缀
         aicarus_conversation_info: Optional[ConversationInfo] = None
         aicarus_user_info: Optional[UserInfo] = None
 
         if napcat_message_type == MessageType.private:
-            aicarus_user_info = await recv_handler._napcat_to_aicarus_userinfo(
-                napcat_sender, group_id=None
+            event_type_parts = ("private", napcat_sub_type or "other")
+            temp_group_id: Optional[str] = None
+            if napcat_sub_type == MessageType.Private.group:
+                temp_group_id = qq_id_str(napcat_event.get("group_id", "")).strip()
+                if not temp_group_id or temp_group_id == "0":
+                    logger.warning(
+                        f"临时会话事件 {napcat_message_id} 缺少有效的 group_id。"
+                    )
+                    temp_group_id = None
+            # 私聊不查群成员信息，发送者直接用事件里的数据同步拼好；只有临时会话要去查一下群
+            aicarus_user_info = recv_handler._build_userinfo(napcat_sender)
+            temp_conversation_info = (
+                await recv_handler._napcat_to_aicarus_conversationinfo(temp_group_id)
+                if temp_group_id
+                else None
             )
-            event_type_suffix = f"private.{napcat_sub_type or 'other'}"
             if napcat_sub_type == MessageType.Private.friend:
                 if aicarus_user_info:
                     aicarus_conversation_info = (
@@ -69,62 +199,61 @@ class MessageEventFactory(BaseEventFactory):
                             aicarus_user_info
                         )
                     )
-            elif napcat_sub_type == MessageType.Private.group:
-                temp_group_id = str(napcat_event.get("group_id", "")).strip()
-                if temp_group_id and temp_group_id != "0":
-                    aicarus_conversation_info = (
-                        await recv_handler._napcat_to_aicarus_conversationinfo(
-                            temp_group_id
-                        )
-                    )
-                else:
-                    logger.warning(
-                        f"临时会话事件 {napcat_message_id} 缺少有效的 group_id。"
-                    )
+            else:
+                aicarus_conversation_info = temp_conversation_info
 
         elif napcat_message_type == MessageType.group:
-            group_id = str(napcat_event.get("group_id", ""))
-            aicarus_user_info = await recv_handler._napcat_to_aicarus_userinfo(
-                napcat_sender, group_id=group_id
-            )
-            aicarus_conversation_info = (
-                await recv_handler._napcat_to_aicarus_conversationinfo(group_id)
+            group_id = qq_id_str(napcat_event.get("group_id", ""))
+            # 成员信息和群信息是两次独立的查询，一起发出去，总耗时只取慢的那个
+            aicarus_user_info, aicarus_conversation_info = await asyncio.gather(
+                recv_handler._napcat_to_aicarus_userinfo(
+                    napcat_sender, group_id=group_id
+                ),
+                recv_handler._napcat_to_aicarus_conversationinfo(group_id),
             )
-            event_type_suffix = f"group.{napcat_sub_type or 'other'}"
+            event_type_parts = ("group", napcat_sub_type or "other")
         else:
             logger.warning(f"事件化妆间: 不认识的消息类型: {napcat_message_type}")
             return None
 
         # 最终的、完美的、带有命名空间的事件类型！
-        final_event_type = f"message.{platform_id}.{event_type_suffix}"
-
-        # 把字体和匿名信息都塞进这个“套套”里，才算完整！
-        metadata_data = {"message_id": napcat_message_id}
-        if napcat_event.get("font") is not None:
-            metadata_data["font"] = str(napcat_event.get("font"))
-        if napcat_sub_type == MessageType.Group.anonymous and napcat_event.get(
-            "anonymous"
-        ):
-            metadata_data["anonymity_info"] = napcat_event.get("anonymous")
-
-        content_segs = [Seg(type="message_metadata", data=metadata_data)]
-        message_segs = await recv_handler._napcat_to_aicarus_seglist(
-            napcat_event.get("message", []), napcat_event
-        )
+        final_event_type = _event_type("message", platform_id, *event_type_parts)
+
+        # 纯文字/表情的消息同步转完，不用再多走一层协程；有图片或合并转发才走 async 版本
+        napcat_message = napcat_event.get("message", [])
+        message_segs = recv_handler._napcat_to_aicarus_seglist_sync(napcat_message)
+        if message_segs is None:
+            message_segs = await recv_handler._napcat_to_aicarus_seglist(
+                napcat_message, napcat_event
+            )
         if not message_segs:
             return None
-        content_segs.extend(message_segs)
+
+        # 把字体和匿名信息都塞进这个“套套”里，才算完整！每个字段只取一次
+        font = napcat_event.get("font")
+        anonymous = (
+            napcat_event.get("anonymous")
+            if napcat_sub_type == MessageType.Group.anonymous
+            else None
+        )
+        metadata_data: Dict[str, Any] = {"message_id": napcat_message_id}
+        if font is not None:
+            metadata_data["font"] = str(font)
+        if anonymous:
+            metadata_data["anonymity_info"] = anonymous
+
+        content_segs = [Seg(type="message_metadata", data=metadata_data), *message_segs]
 
         # --- ❤❤❤ 高潮点 #3: 构造全新的Event，platform字段已被彻底阉割！❤❤❤ ---
-        return Event(
-            event_id=f"message_{napcat_message_id}_{uuid.uuid4()}",
-            event_type=final_event_type,  # 使用我们全新的event_type！
-            time=napcat_event.get("time", time.time()) * 1000.0,
-            bot_id=bot_id,
+        return _build_event(
+            f"message_{napcat_message_id}",
+            final_event_type,  # 使用我们全新的event_type！
+            napcat_event,
+            bot_id,
+            content_segs,
             user_info=aicarus_user_info,
             conversation_info=aicarus_conversation_info,
-            content=content_segs,
-            raw_data=json.dumps(napcat_event),
+            raw_json=raw_json,
         )
 
 
@@ -132,23 +261,23 @@ class NoticeEventFactory(BaseEventFactory):
     """专门负责构造“通知事件”的化妆师。"""
 
     async def create_event(
-        self, napcat_event: Dict[str, Any], recv_handler: "RecvHandlerAicarus"
+        self,
+        napcat_event: Dict[str, Any],
+        recv_handler: "RecvHandlerAicarus",
+        raw_json: Optional[str] = None,
     ) -> Optional[Event]:
         notice_type = napcat_event.get("notice_type")
-        bot_id = (
-            str(napcat_event.get("self_id"))
-            or await recv_handler._get_bot_id()
-            or "unknown_bot"
+        bot_id = _known_bot_id(napcat_event, recv_handler) or await _resolve_bot_id(
+            recv_handler
         )
-        cfg = recv_handler.global_config
         # --- ❤❤❤ 同样，先拿到我们神圣的平台ID！❤❤❤ ---
-        platform_id = cfg.core_platform_id
+        platform_id = recv_handler.platform_id
 
-        user_id_in_notice = str(napcat_event.get("user_id", "")).strip()
+        user_id_in_notice = qq_id_str(napcat_event.get("user_id", "")).strip()
         is_bot_profile_update = user_id_in_notice == bot_id
 
         if notice_type == NoticeType.group_card and is_bot_profile_update:
-            group_id = str(napcat_event.get("group_id", "")).strip()
+            group_id = qq_id_str(napcat_event.get("group_id", "")).strip()
             if not group_id:
                 logger.warning("收到了机器人群名片变更通知，但缺少group_id，无法处理。")
                 return None
@@ -168,178 +297,182 @@ class NoticeEventFactory(BaseEventFactory):
                 bot_id, platform_id, report_data
             )
 
-        group_id_str = str(napcat_event.get("group_id", "")).strip()
+        group_id_str = qq_id_str(napcat_event.get("group_id", "")).strip()
         group_id_for_context = (
             group_id_str if group_id_str and group_id_str != "0" else None
         )
-        subject_user_id_str = str(napcat_event.get("user_id", "")).strip()
+        subject_user_id_str = qq_id_str(napcat_event.get("user_id", "")).strip()
         subject_user_id = (
             subject_user_id_str
             if subject_user_id_str and subject_user_id_str != "0"
             else None
         )
-        operator_id_str = str(napcat_event.get("operator_id", "")).strip()
+        operator_id_str = qq_id_str(napcat_event.get("operator_id", "")).strip()
         operator_id = (
             operator_id_str if operator_id_str and operator_id_str != "0" else None
         )
 
-        conversation_info: Optional[ConversationInfo] = None
-        if group_id_for_context:
-            conversation_info = await recv_handler._napcat_to_aicarus_conversationinfo(
-                group_id_for_context
-            )
+        # 这些通知意味着群资料或成员资料变了，先把旧缓存丢掉，下面查到的就是新的
+        if group_id_for_context and notice_type in (
+            NoticeType.group_admin,
+            NoticeType.group_increase,
+            NoticeType.group_decrease,
+            NoticeType.group_card,
+        ):
+            recv_handler.invalidate_group_cache(group_id_for_context)
+            if subject_user_id:
+                recv_handler.invalidate_group_cache(
+                    group_id_for_context, subject_user_id
+                )
 
-        user_info: Optional[UserInfo] = None
-        if subject_user_id:
-            user_info = await recv_handler._napcat_to_aicarus_userinfo(
+        # 会话、主体用户、操作者三个查询互不依赖，一起发出去，总耗时只取最慢的那个
+        conversation_info: Optional[ConversationInfo]
+        user_info: Optional[UserInfo]
+        operator: Optional[UserInfo]
+        conversation_info, user_info, operator = await asyncio.gather(
+            recv_handler._napcat_to_aicarus_conversationinfo(group_id_for_context)
+            if group_id_for_context
+            else _noop(),
+            recv_handler._napcat_to_aicarus_userinfo(
                 {"user_id": subject_user_id}, group_id=group_id_for_context
             )
+            if subject_user_id
+            else _noop(),
+            recv_handler._napcat_to_aicarus_userinfo(
+                {"user_id": operator_id}, group_id=group_id_for_context
+            )
+            if operator_id and notice_type in _NOTICE_TYPES_WITH_OPERATOR
+            else _noop(),
+        )
 
         # --- ❤❤❤ 同样，动态拼接event_type！❤❤❤ ---
-        event_type_suffix = f"unknown.{notice_type}"
-        notice_data: Dict[str, Any] = {}
-
-        if notice_type == NoticeType.group_upload:
-            event_type_suffix = "conversation.file_upload"
-            notice_data = {
-                "file_info": napcat_event.get("file", {}),
-                "uploader_user_info": user_info.to_dict() if user_info else None,
-            }
-
-        elif notice_type == NoticeType.group_admin:
-            event_type_suffix = "conversation.admin_change"
-            notice_data = {
-                "target_user_info": user_info.to_dict() if user_info else None,
-                "action_type": "set"
-                if napcat_event.get("sub_type") == "set"
-                else "unset",
-            }
-
-        elif notice_type == NoticeType.group_decrease:
-            event_type_suffix = "conversation.member_decrease"
-            operator = (
-                await recv_handler._napcat_to_aicarus_userinfo(
-                    {"user_id": operator_id}, group_id=group_id_for_context
-                )
-                if operator_id
-                else None
+        # 按通知类型查表找到对应的“小化妆师”，找不到或者她不接，就按通用通知处理
+        ctx = _NoticeContext(
+            napcat_event=napcat_event,
+            recv_handler=recv_handler,
+            group_id=group_id_for_context,
+            user_info=user_info,
+            operator=operator,
+        )
+        builder = self._NOTICE_BUILDERS.get(notice_type)
+        built = await builder(self, ctx) if builder is not None else None
+        if built is None:
+            logger.warning(
+                f"接收到未明确处理的通知类型: {notice_type}，将作为通用通知处理。"
             )
-            notice_data = {
-                "operator_user_info": operator.to_dict() if operator else None,
-                "leave_type": napcat_event.get("sub_type"),
-            }
+            # 给个更明确的后缀
+            built = (f"platform_specific.{notice_type}", napcat_event.copy())
+        event_type_suffix, notice_data = built
 
-        elif notice_type == NoticeType.group_increase:
-            event_type_suffix = "conversation.member_increase"
-            operator = (
-                await recv_handler._napcat_to_aicarus_userinfo(
-                    {"user_id": operator_id}, group_id=group_id_for_context
-                )
-                if operator_id
-                else None
-            )
-            notice_data = {
-                "operator_user_info": operator.to_dict() if operator else None,
-                "join_type": napcat_event.get("sub_type"),
-            }
+        final_event_type = _event_type("notice", platform_id, event_type_suffix)
 
-        elif notice_type == NoticeType.group_ban:
-            event_type_suffix = "conversation.member_ban"
-            duration = napcat_event.get("duration", 0)
-            operator = (
-                await recv_handler._napcat_to_aicarus_userinfo(
-                    {"user_id": operator_id}, group_id=group_id_for_context
-                )
-                if operator_id
-                else None
-            )
-            notice_data = {
-                "target_user_info": user_info.to_dict() if user_info else None,
-                "operator_user_info": operator.to_dict() if operator else None,
-                "duration_seconds": duration,
-                "ban_type": "ban" if duration > 0 else "lift_ban",
-            }
+        content_seg = Seg(type=final_event_type, data=notice_data)
+        return _build_event(
+            f"notice_{notice_type}",
+            final_event_type,
+            napcat_event,
+            bot_id,
+            [content_seg],
+            user_info=ctx.user_info,
+            conversation_info=conversation_info,
+            raw_json=raw_json,
+        )
 
-        elif (
-            notice_type == NoticeType.group_recall
-            or notice_type == NoticeType.friend_recall
-        ):
-            event_type_suffix = "message.recalled"
-            operator = (
-                await recv_handler._napcat_to_aicarus_userinfo(
-                    {"user_id": operator_id}, group_id=group_id_for_context
-                )
-                if operator_id
-                else None
-            )
-            notice_data = {
-                "recalled_message_id": str(napcat_event.get("message_id", "")),
-                "recalled_message_sender_info": user_info.to_dict()
-                if user_info
-                else None,
-                "operator_user_info": operator.to_dict()
-                if operator
-                else (
-                    user_info.to_dict()
-                    if user_info and notice_type == NoticeType.friend_recall
-                    else None
-                ),
-            }
+    # --- 各种通知的“小化妆师”，返回 (event_type 后缀, notice_data)，不接就返回 None ---
 
-        elif (
-            notice_type == NoticeType.notify and napcat_event.get("sub_type") == "poke"
-        ):
-            event_type_suffix = "user.poke"
-            target_id = str(napcat_event.get("target_id", ""))
-            sender_id = str(napcat_event.get("sender_id", ""))
+    async def _build_group_upload(self, ctx: "_NoticeContext") -> _NoticeBuildResult:
+        return "conversation.file_upload", {
+            "file_info": ctx.napcat_event.get("file", {}),
+            "uploader_user_info": _user_info_dict(ctx.user_info),
+        }
 
-            sender_info = await recv_handler._napcat_to_aicarus_userinfo(
-                {"user_id": sender_id}, group_id=group_id_for_context
-            )
-            target_info = await recv_handler._napcat_to_aicarus_userinfo(
-                {"user_id": target_id}, group_id=group_id_for_context
-            )
+    async def _build_group_admin(self, ctx: "_NoticeContext") -> _NoticeBuildResult:
+        return "conversation.admin_change", {
+            "target_user_info": _user_info_dict(ctx.user_info),
+            "action_type": "set"
+            if ctx.napcat_event.get("sub_type") == "set"
+            else "unset",
+        }
 
-            user_info = sender_info  # 戳一戳事件的主体是发起者
-            notice_data = {
-                "sender_user_info": sender_info.to_dict() if sender_info else None,
-                "target_user_info": target_info.to_dict() if target_info else None,
-                "context_type": "group" if group_id_for_context else "private",
-            }
+    async def _build_group_decrease(self, ctx: "_NoticeContext") -> _NoticeBuildResult:
+        return "conversation.member_decrease", {
+            "operator_user_info": _user_info_dict(ctx.operator),
+            "leave_type": ctx.napcat_event.get("sub_type"),
+        }
 
-        else:
-            logger.warning(
-                f"接收到未明确处理的通知类型: {notice_type}，将作为通用通知处理。"
-            )
-            event_type_suffix = f"platform_specific.{notice_type}"  # 给个更明确的后缀
-            notice_data = napcat_event.copy()
+    async def _build_group_increase(self, ctx: "_NoticeContext") -> _NoticeBuildResult:
+        return "conversation.member_increase", {
+            "operator_user_info": _user_info_dict(ctx.operator),
+            "join_type": ctx.napcat_event.get("sub_type"),
+        }
 
-        final_event_type = f"notice.{platform_id}.{event_type_suffix}"
+    async def _build_group_ban(self, ctx: "_NoticeContext") -> _NoticeBuildResult:
+        duration = ctx.napcat_event.get("duration", 0)
+        return "conversation.member_ban", {
+            "target_user_info": _user_info_dict(ctx.user_info),
+            "operator_user_info": _user_info_dict(ctx.operator),
+            "duration_seconds": duration,
+            "ban_type": "ban" if duration > 0 else "lift_ban",
+        }
 
-        content_seg = Seg(type=final_event_type, data=notice_data)
-        return Event(
-            event_id=f"notice_{notice_type}_{uuid.uuid4().hex[:6]}",
-            event_type=final_event_type,
-            time=napcat_event.get("time", time.time()) * 1000.0,
-            bot_id=bot_id,
-            user_info=user_info,
-            conversation_info=conversation_info,
-            content=[content_seg],
-            raw_data=json.dumps(napcat_event),
+    async def _build_recall(self, ctx: "_NoticeContext") -> _NoticeBuildResult:
+        is_friend_recall = (
+            ctx.napcat_event.get("notice_type") == NoticeType.friend_recall
         )
+        return "message.recalled", {
+            "recalled_message_id": str(ctx.napcat_event.get("message_id", "")),
+            "recalled_message_sender_info": _user_info_dict(ctx.user_info),
+            "operator_user_info": _user_info_dict(
+                ctx.operator or (ctx.user_info if is_friend_recall else None)
+            ),
+        }
+
+    async def _build_notify(self, ctx: "_NoticeContext") -> _NoticeBuildResult:
+        # notify 下面目前只认戳一戳，其他的交给通用处理
+        if ctx.napcat_event.get("sub_type") != NoticeType.Notify.poke:
+            return None
+        target_id = qq_id_str(ctx.napcat_event.get("target_id", ""))
+        sender_id = qq_id_str(ctx.napcat_event.get("sender_id", ""))
+
+        sender_info, target_info = await asyncio.gather(
+            ctx.recv_handler._napcat_to_aicarus_userinfo(
+                {"user_id": sender_id}, group_id=ctx.group_id
+            ),
+            ctx.recv_handler._napcat_to_aicarus_userinfo(
+                {"user_id": target_id}, group_id=ctx.group_id
+            ),
+        )
+
+        ctx.user_info = sender_info  # 戳一戳事件的主体是发起者
+        return "user.poke", {
+            "sender_user_info": _user_info_dict(sender_info),
+            "target_user_info": _user_info_dict(target_info),
+            "context_type": "group" if ctx.group_id else "private",
+        }
+
+    _NOTICE_BUILDERS: Dict[str, _NoticeBuilder] = {
+        NoticeType.group_upload: _build_group_upload,
+        NoticeType.group_admin: _build_group_admin,
+        NoticeType.group_decrease: _build_group_decrease,
+        NoticeType.group_increase: _build_group_increase,
+        NoticeType.group_ban: _build_group_ban,
+        NoticeType.group_recall: _build_recall,
+        NoticeType.friend_recall: _build_recall,
+        NoticeType.notify: _build_notify,
+    }
 
     def _create_bot_profile_update_event(
         self, bot_id: str, platform_id: str, report_data: Dict[str, Any]
     ) -> Event:
         """创建一个机器人档案更新的特殊通知事件。"""
         # --- ❤❤❤ 特殊事件也要有新烙印！❤❤❤ ---
-        event_type = f"notice.{platform_id}.bot.profile_update"
+        event_type = _event_type("notice", platform_id, "bot", "profile_update")
         conversation_id = report_data.get("conversation_id", "unknown")
 
         return Event(
-            event_id=f"bot_profile_update_{conversation_id}_{uuid.uuid4().hex[:6]}",
+            event_id=new_event_id(f"bot_profile_update_{conversation_id}"),
             event_type=event_type,
-            time=time.time() * 1000.0,
+            time=now_ms(),
             bot_id=bot_id,
             content=[Seg(type=event_type, data=report_data)],
         )
@@ -349,77 +482,96 @@ class RequestEventFactory(BaseEventFactory):
     """专门负责构造“请求事件”的化妆师。"""
 
     async def create_event(
-        self, napcat_event: Dict[str, Any], recv_handler: "RecvHandlerAicarus"
+        self,
+        napcat_event: Dict[str, Any],
+        recv_handler: "RecvHandlerAicarus",
+        raw_json: Optional[str] = None,
     ) -> Optional[Event]:
         request_type = napcat_event.get("request_type")
-        bot_id = (
-            str(napcat_event.get("self_id"))
-            or await recv_handler._get_bot_id()
-            or "unknown_bot"
+        bot_id = _known_bot_id(napcat_event, recv_handler) or await _resolve_bot_id(
+            recv_handler
         )
-        cfg = recv_handler.global_config
-        platform_id = cfg.core_platform_id
+        platform_id = recv_handler.platform_id
 
-        event_type_suffix = f"unknown.{request_type}"
-        user_info: Optional[UserInfo] = None
-        conversation_info: Optional[ConversationInfo] = None
-        user_id = str(napcat_event.get("user_id", ""))
-        group_id = str(napcat_event.get("group_id", ""))
+        user_info: Optional[UserInfo]
+        conversation_info: Optional[ConversationInfo]
+        user_id = qq_id_str(napcat_event.get("user_id", ""))
+        group_id = qq_id_str(napcat_event.get("group_id", ""))
 
-        if user_id:
-            user_info = await recv_handler._napcat_to_aicarus_userinfo(
+        # 申请人和群资料互不依赖，一起查
+        user_info, conversation_info = await asyncio.gather(
+            recv_handler._napcat_to_aicarus_userinfo(
                 {"user_id": user_id}, group_id=group_id if group_id else None
             )
+            if user_id
+            else _noop(),
+            recv_handler._napcat_to_aicarus_conversationinfo(group_id)
+            if request_type == "group" and group_id
+            else _noop(),
+        )
 
         request_data = {
             "comment": napcat_event.get("comment", ""),
             "request_flag": napcat_event.get("flag", ""),
         }
 
-        if request_type == "friend":
-            event_type_suffix = "friend.add"
-
-        elif request_type == "group":
-            sub_type = napcat_event.get("sub_type")
-            if group_id:
-                conversation_info = (
-                    await recv_handler._napcat_to_aicarus_conversationinfo(group_id)
-                )
-
-            if sub_type == "add":
-                event_type_suffix = "conversation.join_application"
-            elif sub_type == "invite":
-                event_type_suffix = "conversation.invitation"
-            request_data["sub_type"] = sub_type
+        builder = self._REQUEST_BUILDERS.get(request_type)
+        if builder is not None:
+            event_type_suffix = builder(napcat_event, request_data)
         else:
             logger.warning(f"事件化妆间: 不认识的请求类型: {request_type}")
+            event_type_suffix = f"unknown.{request_type}"
             request_data = napcat_event.copy()
 
-        final_event_type = f"request.{platform_id}.{event_type_suffix}"
+        final_event_type = _event_type("request", platform_id, event_type_suffix)
 
         content_seg = Seg(type=final_event_type, data=request_data)
-        return Event(
-            event_id=f"request_{request_type}_{uuid.uuid4()}",
-            event_type=final_event_type,
-            time=napcat_event.get("time", time.time()) * 1000.0,
-            bot_id=bot_id,
+        return _build_event(
+            f"request_{request_type}",
+            final_event_type,
+            napcat_event,
+            bot_id,
+            [content_seg],
             user_info=user_info,
             conversation_info=conversation_info,
-            content=[content_seg],
-            raw_data=json.dumps(napcat_event),
+            raw_json=raw_json,
         )
 
+    # --- 各种请求的“小化妆师”：返回 event_type 后缀，需要的话往 request_data 里补东西 ---
+
+    @staticmethod
+    def _build_friend_request(
+        napcat_event: Dict[str, Any], request_data: Dict[str, Any]
+    ) -> str:
+        return "friend.add"
+
+    @staticmethod
+    def _build_group_request(
+        napcat_event: Dict[str, Any], request_data: Dict[str, Any]
+    ) -> str:
+        sub_type = napcat_event.get("sub_type")
+        request_data["sub_type"] = sub_type
+        return _GROUP_REQUEST_SUFFIXES.get(sub_type, "unknown.group")
+
+    _REQUEST_BUILDERS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], str]] = {
+        RequestType.friend: _build_friend_request,
+        RequestType.group: _build_group_request,
+    }
+
 
 class MetaEventFactory(BaseEventFactory):
     """专门负责构造“元事件”的化妆师。"""
 
     async def create_event(
-        self, napcat_event: Dict[str, Any], recv_handler: "RecvHandlerAicarus"
+        self,
+        napcat_event: Dict[str, Any],
+        recv_handler: "RecvHandlerAicarus",
+        raw_json: Optional[str] = None,
     ) -> Optional[Event]:
         event_type_raw = napcat_event.get("meta_event_type")
-        bot_id = str(napcat_event.get("self_id")) or "unknown_bot"
-        cfg = recv_handler.global_config
-        platform_id = cfg.core_platform_id
+        # 元事件不去等 _get_bot_id：lifecycle.connect 自己就是用来发布 bot_id 的
+        bot_id = _known_bot_id(napcat_event, recv_handler) or "unknown_bot"
+        platform_id = recv_handler.platform_id
 
         meta_seg_data: Dict[str, Any] = {}
         event_type_suffix: str = f"unknown.{event_type_raw}"
@@ -428,10 +580,10 @@ class MetaEventFactory(BaseEventFactory):
             sub_type = napcat_event.get("sub_type")
             event_type_suffix = f"lifecycle.{sub_type}"
             if sub_type == "connect":
-                recv_handler.napcat_bot_id = bot_id
-                recv_handler.last_heart_beat = time.time()
+                recv_handler._publish_bot_id(bot_id)
+                recv_handler.mark_heartbeat()
                 logger.info(f"连接高潮！Bot {bot_id} 已连接到Napcat，小猫开始为你心跳~")
-                asyncio.create_task(recv_handler.check_heartbeat(bot_id))
+                recv_handler.start_heartbeat_monitor(bot_id)
 
         elif event_type_raw == MetaEventType.heartbeat:
             # 心跳事件，我们自己消化，不发给Core
@@ -440,7 +592,7 @@ class MetaEventFactory(BaseEventFactory):
                 "good", False
             )
             if is_online:
-                recv_handler.last_heart_beat = time.time()
+                recv_handler.mark_heartbeat()
                 if napcat_event.get("interval"):
                     recv_handler.interval = napcat_event.get("interval") / 1000.0
             else:
@@ -450,18 +602,16 @@ class MetaEventFactory(BaseEventFactory):
         else:
             meta_seg_data = napcat_event.copy()
 
-        final_event_type = f"meta.{platform_id}.{event_type_suffix}"
+        final_event_type = _event_type("meta", platform_id, event_type_suffix)
 
         content_seg = Seg(type=final_event_type, data=meta_seg_data)
-        return Event(
-            event_id=f"meta_{event_type_raw}_{uuid.uuid4()}",
-            event_type=final_event_type,
-            time=napcat_event.get("time", time.time()) * 1000.0,
-            bot_id=bot_id,
-            user_info=None,
-            conversation_info=None,
-            content=[content_seg],
-            raw_data=json.dumps(napcat_event),
+        return _build_event(
+            f"meta_{event_type_raw}",
+            final_event_type,
+            napcat_event,
+            bot_id,
+            [content_seg],
+            raw_json=raw_json,
         )
 
 
@@ -475,16 +625,24 @@ class BaseEventHandler(ABC):
 
     @abstractmethod
     async def execute(
-        self, event_data: Dict[str, Any], recv_handler: "RecvHandlerAicarus"
+        self,
+        event_data: Dict[str, Any],
+        recv_handler: "RecvHandlerAicarus",
+        raw_json: Optional[str] = None,
     ) -> None:
         pass
 
 
 class GenericEventHandler(BaseEventHandler):
     async def execute(
-        self, event_data: Dict[str, Any], recv_handler: "RecvHandlerAicarus"
+        self,
+        event_data: Dict[str, Any],
+        recv_handler: "RecvHandlerAicarus",
+        raw_json: Optional[str] = None,
     ) -> None:
-        aicarus_event = await self._factory.create_event(event_data, recv_handler)
+        aicarus_event = await self._factory.create_event(
+            event_data, recv_handler, raw_json
+        )
         if aicarus_event:
             await recv_handler.dispatch_to_core(aicarus_event)
 
@@ -493,18 +651,18 @@ class MessageEventHandlerWithSelfCheck(GenericEventHandler):
     """这位接待员最特别，她懂得“认亲”，能识别出我们自己的回响！"""
 
     async def execute(
-        self, event_data: Dict[str, Any], recv_handler: "RecvHandlerAicarus"
+        self,
+        event_data: Dict[str, Any],
+        recv_handler: "RecvHandlerAicarus",
+        raw_json: Optional[str] = None,
     ) -> None:
         from .action_register import pending_actions
         from aicarus_protocols import EventBuilder  # 确保导入
 
-        napcat_user_id = str(event_data.get("user_id", ""))
+        napcat_user_id = qq_id_str(event_data.get("user_id", ""))
+        current_bot_id = message_queue.CURRENT_BOT_ID
 
-        if (
-            napcat_user_id
-            and recv_handler.napcat_bot_id
-            and napcat_user_id == recv_handler.napcat_bot_id
-        ):
+        if napcat_user_id and current_bot_id and napcat_user_id == current_bot_id:
             napcat_message_id = str(event_data.get("message_id", ""))
             original_action_id = pending_actions.pop(napcat_message_id, None)
 
@@ -515,17 +673,16 @@ class MessageEventHandlerWithSelfCheck(GenericEventHandler):
 
                 # --- ❤❤❤ 最终修正版！直接、自信、准确！ ❤❤❤ ---
 
-                # 1. 从配置中获取我们确切的平台ID和机器人ID
-                cfg = get_config()
-                platform_id = cfg.core_platform_id
-                # bot_id 可以从 recv_handler 中获取，更准确
-                bot_id = recv_handler.napcat_bot_id or "unknown_bot"
+                # 1. 拿到我们确切的平台ID和机器人ID
+                platform_id = recv_handler.platform_id
+                # bot_id 直接用已经发布好的那个，更准确
+                bot_id = current_bot_id
 
                 # 2. 构造一个最小化但信息完全正确的“原始事件”模拟对象
                 # 我们100%确定它的event_type就是这个，这不是猜测！
                 original_event_mock = Event(
                     event_id=original_action_id,
-                    event_type=f"action.{platform_id}.message.send",
+                    event_type=_event_type("action", platform_id, "message", "send"),
                     time=0,  # 时间不重要
                     bot_id=bot_id,
                     content=[],  # 内容不重要
@@ -541,7 +698,7 @@ class MessageEventHandlerWithSelfCheck(GenericEventHandler):
                 await recv_handler.dispatch_to_core(response_event)
                 return
 
-        await super().execute(event_data, recv_handler)
+        await super().execute(event_data, recv_handler, raw_json)
 
 
 EVENT_HANDLERS: Dict[str, BaseEventHandler] = {
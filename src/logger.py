@@ -1,6 +1,7 @@
 # aicarus_napcat_adapter/src/logger.py
 import sys
 import os
+import time
 from pathlib import Path
 from loguru import logger as loguru_logger
 
@@ -32,6 +33,10 @@ LOG_COMPRESSION = "zip"
 # 移除 loguru 默认的处理器，以便完全自定义
 loguru_logger.remove()
 
+# 默认的上下文字段。需要带上下文的地方用 logger.bind(adapter_ctx=...) 绑一次就行，
+# 格式里的 {extra[adapter_ctx]} 会自动带出来，没绑的日志这里就是空字符串
+loguru_logger.configure(extra={"adapter_ctx": ""})
+
 # 添加控制台输出处理器
 loguru_logger.add(
     sys.stderr,  # 输出到标准错误流
@@ -40,7 +45,7 @@ loguru_logger.add(
         "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
         "<level>{level: <8}</level> | "
         "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
-        "<level>{message}</level>"
+        "{extra[adapter_ctx]}<level>{message}</level>"
     ),
     colorize=True,  # 启用颜色输出
     enqueue=True,  # 异步安全
@@ -54,7 +59,7 @@ loguru_logger.add(
         "{time:YYYY-MM-DD HH:mm:ss.SSS} | "
         "{level: <8} | "
         "{name}:{function}:{line} - "  # 文件中通常不需要颜色，但可以保留模块信息
-        "{message}"
+        "{extra[adapter_ctx]}{message}"
     ),
     rotation=LOG_ROTATION,
     retention=LOG_RETENTION,
@@ -68,6 +73,37 @@ loguru_logger.add(
 # 导出一个可以直接使用的 logger 实例
 logger = loguru_logger
 
+# 控制台和文件里只要有一个会输出 DEBUG，这里就是 True。
+# loguru 没有 isEnabledFor，热路径上可以先看这个开关，再决定要不要拼 debug 日志。
+# 注意文件日志默认就是 DEBUG，所以默认配置下它是 True；
+# 要让这些判断真的省下活儿，得把 ADAPTER_FILE_LOG_LEVEL 调到 INFO 或更高。
+DEBUG_LOG_ENABLED = (
+    min(
+        loguru_logger.level(CONSOLE_LOG_LEVEL).no,
+        loguru_logger.level(FILE_LOG_LEVEL).no,
+    )
+    <= loguru_logger.level("DEBUG").no
+)
+
+# 错误风暴（比如 Napcat 一直发坏数据）时，别每条错误都渲染一遍完整堆栈：
+# 每个时间窗口里只有前几条带堆栈，超出的只记一行消息，窗口过了再恢复
+TRACEBACK_BUDGET_PER_WINDOW = 10
+TRACEBACK_WINDOW_SECONDS = 60.0
+_traceback_window_start = 0.0
+_traceback_used = 0
+
+
+def traceback_allowed() -> bool:
+    """这条错误日志还能不能带堆栈。用法：logger.opt(exception=traceback_allowed()).error(...)"""
+    global _traceback_window_start, _traceback_used
+    now = time.monotonic()
+    if now - _traceback_window_start >= TRACEBACK_WINDOW_SECONDS:
+        _traceback_window_start = now
+        _traceback_used = 0
+    _traceback_used += 1
+    return _traceback_used <= TRACEBACK_BUDGET_PER_WINDOW
+
+
 # --- 使用示例 (可以在其他模块中这样导入和使用) ---
 # from .logger import logger # 或者 from project_root.src.logger import logger (取决于启动方式)
 #
@@ -79,6 +115,7 @@ logger = loguru_logger
 #     1 / 0
 # except ZeroDivisionError:
 #     logger.exception("捕获到一个异常！") # exception 会自动记录堆栈信息
+#     logger.opt(exception=True).error("...")  # 其他级别要带堆栈用 opt，loguru 不认 exc_info=True
 
 if __name__ == "__main__":
     # 用于测试 logger.py 本身的配置
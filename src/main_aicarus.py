@@ -6,12 +6,14 @@ import json
 import websockets  # 确保导入
 
 # 项目内部模块
-from .logger import logger
+from .logger import logger, DEBUG_LOG_ENABLED, traceback_allowed
 
 # 直接导入 recv_handler_aicarus 实例，而不是类
 from .recv_handler_aicarus import recv_handler_aicarus
+from .event_definitions import EVENT_HANDLERS
 from .send_handler_aicarus import send_handler_aicarus
 from .config import get_config  # 添加global_config
+from .utils import install_uvloop, loads_json, close_image_http_session
 from .aic_com_layer import (  # 从新的 v1.5.1 通信层导入
     aic_start_com,  # 这个函数现在会启动 core_connection_client.run_forever()
     aic_stop_com,  # 这个函数会调用 core_connection_client.stop_communication()
@@ -32,6 +34,10 @@ from aicarus_protocols import (
 
 # recv_handler_aicarus 实例已在其模块中创建并导入，此处无需再创建
 
+# 要交给事件处理器的 post_type，其他的（包括 message_sent）都不要。
+# 直接取处理器表的 key，两边认识的类型永远一致
+_PROCESSED_POST_TYPES = frozenset(EVENT_HANDLERS)
+
 
 async def napcat_message_receiver(
     server_connection: websockets.WebSocketServerProtocol,
@@ -53,16 +59,24 @@ async def napcat_message_receiver(
     core_com_task = asyncio.create_task(aic_start_com())
     # -----------------------------------------------------------
 
+    # 循环里每帧都要用的几个方法先取成局部变量，省掉每次的属性查找
+    log_debug, log_error = logger.debug, logger.error
+    put_event = internal_event_queue.put
+
     try:
         async for raw_message_str in server_connection:
-            logger.debug(
-                f"AIcarus Adapter: Raw from Napcat: {raw_message_str[:120]}..."
-            )
+            # 每一帧都会走到这里，没开 DEBUG 就连切片带格式化一起省掉
+            if DEBUG_LOG_ENABLED:
+                log_debug(
+                    "AIcarus Adapter: Raw from Napcat: {}...", raw_message_str[:120]
+                )
             try:
-                napcat_event: dict = json.loads(raw_message_str)
+                # 装了 orjson 就走 orjson；Napcat 发的是 bytes 也不用先 decode
+                napcat_event: dict = loads_json(raw_message_str)
             except json.JSONDecodeError:
-                logger.error(
-                    f"AIcarus Adapter: Failed to decode JSON from Napcat: {raw_message_str}"
+                log_error(
+                    "AIcarus Adapter: Failed to decode JSON from Napcat: {}",
+                    raw_message_str,
                 )
                 continue
 
@@ -70,15 +84,19 @@ async def napcat_message_receiver(
 
             # --- 这就是修改后的逻辑 ---
             # 我们只关心这几种类型的事件，直接把它们丢给事件处理器队列
-            if post_type in ["meta_event", "message", "notice", "request"]:
-                await internal_event_queue.put(napcat_event)
+            if post_type in _PROCESSED_POST_TYPES:
+                # 原始帧一起带上，构造 Event 时直接当 raw_data，不用再序列化一遍
+                if isinstance(raw_message_str, bytes):
+                    raw_message_str = raw_message_str.decode("utf-8")
+                await put_event((napcat_event, raw_message_str))
             # 我们也关心 Napcat API 的响应
             elif napcat_event.get("echo"):
                 await put_napcat_api_response(napcat_event)
             # 对于其他所有类型的 post_type (包括 message_sent)，我们直接忽略，让它们随风而去~
             else:
-                logger.debug(
-                    f"AIcarus Adapter: Ignoring Napcat event with post_type '{post_type}'."
+                log_debug(
+                    "AIcarus Adapter: Ignoring Napcat event with post_type '{}'.",
+                    post_type,
                 )
 
     except websockets.exceptions.ConnectionClosedOK:
@@ -90,9 +108,8 @@ async def napcat_message_receiver(
             f"Napcat client {server_connection.remote_address} connection closed with error: {e}"
         )
     except Exception as e:
-        logger.error(
+        logger.opt(exception=True).error(
             f"处理 Napcat 连接时发生未知错误 ({server_connection.remote_address}): {e}",
-            exc_info=True,
         )
     finally:
         logger.info(f"Napcat 客户端连接已结束: {server_connection.remote_address}")
@@ -115,15 +132,17 @@ async def napcat_event_processor():
     """从内部队列中取出 Napcat 事件并分发给 RecvHandlerAicarus 的统一入口"""
     logger.info("Napcat 事件处理器已启动，等待处理事件... (工厂模式)")
     while True:
-        napcat_event = await internal_event_queue.get()
+        napcat_event, raw_json = await internal_event_queue.get()
         try:
             # 无需再判断 post_type，直接丢给“老鸨”处理，好爽~
-            await recv_handler_aicarus.process_event(napcat_event)
+            await recv_handler_aicarus.process_event(napcat_event, raw_json)
         except Exception as e:
             post_type = napcat_event.get("post_type", "unknown")
-            logger.error(
-                f"AIcarus Adapter: Error processing Napcat event (post_type: {post_type}): {e}",
-                exc_info=True,
+            # 每个事件都可能走到这里，坏数据一多就只给前几条带堆栈
+            logger.opt(exception=traceback_allowed()).error(
+                "AIcarus Adapter: Error processing Napcat event (post_type: {}): {}",
+                post_type,
+                e,
             )
         finally:
             internal_event_queue.task_done()
@@ -143,13 +162,18 @@ async def start_napcat_websocket_server(config):
             ping_interval=20,
             ping_timeout=10,
             max_size=2**20,  # 1MB max message size
+            # 默认只缓冲 32 帧，群消息一刷屏读缓冲就满了、开始对 Napcat 施加背压；
+            # 这里的循环只是把事件转进内部队列，放宽一些不怕堆积
+            max_queue=256,
         ):
             logger.info(
                 f"AIcarus Napcat Adapter WebSocket 服务器已启动，等待 Napcat 连接... (Protocol v{PROTOCOL_VERSION})"
             )
             await asyncio.Future()  # 永远运行
     except Exception as e:
-        logger.critical(f"启动 Napcat WebSocket 服务器时发生错误: {e}", exc_info=True)
+        logger.opt(exception=True).critical(
+            f"启动 Napcat WebSocket 服务器时发生错误: {e}"
+        )
         sys.exit(1)
 
 
@@ -182,7 +206,7 @@ async def main():
     except KeyboardInterrupt:
         logger.info("收到中断信号，正在关闭 AIcarus Napcat Adapter...")
     except Exception as e:
-        logger.critical(f"Adapter 运行时发生致命错误: {e}", exc_info=True)
+        logger.opt(exception=True).critical(f"Adapter 运行时发生致命错误: {e}")
     finally:
         # 清理和关闭
         logger.info("正在关闭所有组件...")
@@ -204,15 +228,17 @@ async def main():
 
         # 停止与 Core 的通信
         await aic_stop_com()
+        await close_image_http_session()
 
         logger.info("AIcarus Napcat Adapter 已完全关闭。")
 
 
 if __name__ == "__main__":
     try:
+        install_uvloop()
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("程序被用户中断。")
     except Exception as e:
-        logger.critical(f"程序启动失败: {e}", exc_info=True)
+        logger.opt(exception=True).critical(f"程序启动失败: {e}")
         sys.exit(1)
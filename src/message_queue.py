@@ -41,8 +41,13 @@ _api_response_received_time: Dict[str, float] = {}
 # 例如，WebSocket 接收线程可以将原始 Napcat 事件放入此队列，
 # 由另一个任务（如 napcat_event_processor）来处理。
 # 这与你之前参考代码中的 message_queue 类似。
+# 队列里放的是 (解析好的事件, 原始 JSON 帧)
 internal_event_queue = asyncio.Queue()
 
+# 当前 Napcat 连接对应的机器人 ID，由 recv_handler_aicarus 在拿到 Bot ID 后一次性发布
+# 热路径直接读这个模块变量，不用再去 handler 实例上层层找属性
+CURRENT_BOT_ID: Optional[str] = None
+
 
 async def get_napcat_api_response(
     request_echo_id: str, timeout_seconds: Optional[float] = None
@@ -61,13 +66,13 @@ async def get_napcat_api_response(
     Raises:
         asyncio.TimeoutError: 如果在超时时间内未收到响应。
     """
-    adapter_config = get_config()  # 获取配置
     # 如果未指定超时时间，可以使用一个基于心跳的合理默认值，例如心跳间隔的两倍
     # 或者一个固定的较短超时，例如10-15秒，因为API调用通常不应花费太长时间
+    # 调用方几乎都会传超时时间，这时候就不用去读配置了
     effective_timeout = (
         timeout_seconds
         if timeout_seconds is not None
-        else float(adapter_config.napcat_heartbeat_interval_seconds * 2)
+        else float(get_config().napcat_heartbeat_interval_seconds * 2)
     )
     if effective_timeout <= 0:  # 确保超时时间为正
         effective_timeout = 15.0  # 一个备用默认值
@@ -75,13 +80,15 @@ async def get_napcat_api_response(
     future = asyncio.Future()
     _api_response_futures[request_echo_id] = future
     logger.debug(
-        f"正在为 Napcat API 请求 (echo: {request_echo_id}) 等待响应，超时时间: {effective_timeout}s"
+        "正在为 Napcat API 请求 (echo: {}) 等待响应，超时时间: {}s",
+        request_echo_id,
+        effective_timeout,
     )
 
     try:
         # 等待 Future 被设置结果，或者超时
         response_data = await asyncio.wait_for(future, timeout=effective_timeout)
-        logger.debug(f"收到 Napcat API 响应 (echo: {request_echo_id})")
+        logger.debug("收到 Napcat API 响应 (echo: {})", request_echo_id)
         return response_data
     except asyncio.TimeoutError:
         logger.warning(
@@ -115,7 +122,7 @@ async def put_napcat_api_response(response_data: Dict[str, Any]) -> None:
     if future and not future.done():
         future.set_result(response_data)  # 将响应数据设置为 Future 的结果
         _api_response_received_time[str(echo_id)] = time.monotonic()  # 记录响应时间
-        logger.debug(f"已为 echo ID '{echo_id}' 设置 Napcat API 响应。")
+        logger.debug("已为 echo ID '{}' 设置 Napcat API 响应。", echo_id)
     elif future and future.done():
         logger.warning(
             f"收到 echo ID '{echo_id}' 的重复或延迟的 Napcat 响应，但 Future 已完成。"
@@ -1,65 +1,70 @@
 # 定义 Napcat 特有的常量
+# 全部都是只读常量，用 Final 标注，别在运行时去改它们
+from enum import Enum
+from typing import Final
 
 
 class MetaEventType:
-    lifecycle = "lifecycle"
-    heartbeat = "heartbeat"
+    lifecycle: Final[str] = "lifecycle"
+    heartbeat: Final[str] = "heartbeat"
 
     class Lifecycle:
-        enable = "enable"
-        disable = "disable"
-        connect = "connect"
+        enable: Final[str] = "enable"
+        disable: Final[str] = "disable"
+        connect: Final[str] = "connect"
 
 
 class MessageType:
-    private = "private"
-    group = "group"
-    guild = "guild"
+    private: Final[str] = "private"
+    group: Final[str] = "group"
+    guild: Final[str] = "guild"
 
     class Private:
-        friend = "friend"
-        group = "group"  # 群临时会话
-        guild = "guild"  # 频道私聊
-        other = "other"
+        friend: Final[str] = "friend"
+        group: Final[str] = "group"  # 群临时会话
+        guild: Final[str] = "guild"  # 频道私聊
+        other: Final[str] = "other"
 
     class Group:
-        normal = "normal"
-        anonymous = "anonymous"
-        notice = "notice"
+        normal: Final[str] = "normal"
+        anonymous: Final[str] = "anonymous"
+        notice: Final[str] = "notice"
 
     class Guild:
-        normal = "normal"
+        normal: Final[str] = "normal"
 
 
 class NoticeType:
-    group_upload = "group_upload"
-    group_admin = "group_admin"
-    group_decrease = "group_decrease"
-    group_increase = "group_increase"
-    group_ban = "group_ban"
-    friend_add = "friend_add"
-    group_recall = "group_recall"
-    friend_recall = "friend_recall"
-    group_card = "group_card"
-    offline_file = "offline_file"
-    client_status = "client_status"
-    essence = "essence"
-    notify = "notify"
+    group_upload: Final[str] = "group_upload"
+    group_admin: Final[str] = "group_admin"
+    group_decrease: Final[str] = "group_decrease"
+    group_increase: Final[str] = "group_increase"
+    group_ban: Final[str] = "group_ban"
+    friend_add: Final[str] = "friend_add"
+    group_recall: Final[str] = "group_recall"
+    friend_recall: Final[str] = "friend_recall"
+    group_card: Final[str] = "group_card"
+    offline_file: Final[str] = "offline_file"
+    client_status: Final[str] = "client_status"
+    essence: Final[str] = "essence"
+    notify: Final[str] = "notify"
 
     class Notify:
-        poke = "poke"
-        lucky_king = "lucky_king"
-        honor = "honor"
-        title = "title"
+        poke: Final[str] = "poke"
+        lucky_king: Final[str] = "lucky_king"
+        honor: Final[str] = "honor"
+        title: Final[str] = "title"
 
 
 class RequestType:
-    friend = "friend"
-    group = "group"
+    friend: Final[str] = "friend"
+    group: Final[str] = "group"
 
 
 # Napcat 消息段类型 (real_message_type)
-class NapcatSegType:
+class NapcatSegType(str, Enum):
+    """成员本身就是 str，可以直接当字符串用；分派表直接用 .value 当 key。"""
+
     text = "text"
     face = "face"
     image = "image"
@@ -83,6 +88,6 @@ class NapcatSegType:
     cardimage = "cardimage"  # 未在你的代码中看到，但某些 gocq 版本有
     tts = "tts"  # 文本转语音
 
-
-# AIcarus 协议版本 - v1.5.1
-AICARUS_PROTOCOL_VERSION = "1.5.1"
+    # 保持和普通字符串常量一样的打印效果，免得 f-string 里变成 "NapcatSegType.text"
+    __str__ = str.__str__
+    __format__ = str.__format__
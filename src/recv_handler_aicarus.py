@@ -1,14 +1,15 @@
 # aicarus_napcat_adapter/src/recv_handler_aicarus.py (小色猫·绝对统治版)
 import time
 import asyncio
-import uuid
-from typing import List, Optional, Dict, Any
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple, Hashable, Callable, Awaitable
 import websockets
 
 # 项目内部模块
 from .logger import logger
 from .config import global_config, get_config
 from .qq_emoji_list import qq_face
+from . import message_queue
 
 from .utils import (
     napcat_get_group_info,
@@ -16,12 +17,51 @@ from .utils import (
     napcat_get_self_info,
     napcat_get_forward_msg_content,
     get_image_base64_from_url,
+    new_event_id,
+    now_ms,
+    qq_id_str,
 )
 from .napcat_definitions import NapcatSegType
 
 # 导入我们全新的、纯洁的协议对象！
 from aicarus_protocols import Event, UserInfo, ConversationInfo, Seg, ConversationType
-from .event_definitions import get_event_handler
+from .event_definitions import EVENT_HANDLERS
+
+# 最近下载过的图片 base64 留几张，同一张图（比如被反复转发的表情）不用重复下载。
+# 一张图的 base64 动辄几百 KB，别开太大
+IMAGE_BASE64_CACHE_SIZE = 128
+# 合并转发的内容发出去就不会变了，群里被反复引用的那几条记下来，不用每次都整棵树重新拉一遍
+FORWARD_CACHE_SIZE = 256
+
+# 固定内容的 Seg data 只建一次，大家共用，别在转换的时候去改它们哦
+_FORWARD_FALLBACK_DATA: Dict[str, Any] = {"text": "[合并转发消息(获取失败)]"}
+_EMPTY_TEXT_DATA: Dict[str, Any] = {"text": ""}
+_AT_ALL_DATA: Dict[str, Any] = {"user_id": "all", "display_name": "@全体成员"}
+# 这几种消息段得先 await 才能转换：图片要先下载，合并转发要去问 Napcat。
+# 一条消息里没有它们的话（绝大多数纯文字/表情消息），整个转换同步做完就行
+_ASYNC_SEG_TYPES = frozenset((NapcatSegType.image.value, NapcatSegType.forward.value))
+# 不下载图片 base64 的时候，图片段也能同步转换，只剩合并转发要等
+_FORWARD_ONLY_SEG_TYPES = frozenset((NapcatSegType.forward.value,))
+# 找图片段时每个消息段都要比一次，先把枚举的值取出来，省掉每次去枚举类上查属性
+_IMAGE_SEG_TYPE: str = NapcatSegType.image.value
+_NO_IMAGES: Dict[str, Optional[str]] = {}
+# 每个表情段都要查一次表情名，直接拿绑定好的 get
+_qq_face_get = qq_face.get
+# Napcat 的用户对象基本都不带 additional_data，没有的时候大家共用这一个空字典
+_EMPTY_ADDITIONAL_DATA: Dict[str, Any] = {}
+# Napcat 的群角色 -> (权限等级, 角色)，查一次表就够，不认识的都当普通成员
+_NAPCAT_GROUP_ROLES: Dict[str, Tuple[str, str]] = {
+    "owner": ("owner", "owner"),
+    "admin": ("admin", "admin"),
+}
+_MEMBER_ROLE: Tuple[str, str] = ("member", "member")
+# 群信息 / 成员信息缓存的一条：(过期时间, 查询结果的 Future)
+_InfoCacheEntry = Tuple[float, asyncio.Future]
+# 心跳超时断连事件的内容是固定的，下游只读不改，整个段直接共用一份
+_HEARTBEAT_TIMEOUT_SEG = Seg(
+    type="meta.lifecycle.disconnect",
+    data={"reason": "heartbeat_timeout", "adapter_version": "2.0.0"},
+)
 
 
 class RecvHandlerAicarus:
@@ -31,39 +71,75 @@ class RecvHandlerAicarus:
     server_connection: Optional[websockets.WebSocketServerProtocol] = None
     napcat_bot_id: Optional[str] = None
     global_config = global_config
-    last_heart_beat: float = 0.0
+    last_heart_beat: float = 0.0  # time.monotonic() 读数，不是时间戳
     interval: float = 5.0
 
     def __init__(self):
         cfg = get_config()
         self.interval = cfg.napcat_heartbeat_interval_seconds
-
-    async def process_event(self, napcat_event: dict) -> None:
-        """我唯一的任务，就是优雅地分派任务给我的“化妆师”们~"""
+        # 平台ID运行期间不会变，取一次存起来，各个“化妆师”直接读这个
+        self.platform_id: str = cfg.core_platform_id
+        # 群信息和群成员信息的缓存时间（秒）。同一个群刷屏时，不用每条消息都去问 Napcat
+        self._group_info_ttl: float = cfg.group_info_cache_ttl_seconds
+        self._member_info_ttl: float = cfg.member_info_cache_ttl_seconds
+        self._info_cache_max: int = cfg.info_cache_max_entries
+        # 配置里强制指定的 Bot ID，运行期间不会变，取一次就好；空字符串表示自动获取
+        self._forced_bot_id: str = str(cfg.force_self_id or "").strip()
+        # Core 只要图片 URL 的话就不用等下载，图片段也走同步转换
+        self._image_base64_enabled: bool = cfg.fetch_image_base64
+        self._async_seg_types: frozenset = (
+            _ASYNC_SEG_TYPES if self._image_base64_enabled else _FORWARD_ONLY_SEG_TYPES
+        )
+        # 缓存里存的是 (过期时间, Future)：正在查询的 Future 过期时间是无穷大，
+        # 同一时间同一个 key 只会真正发一次请求，其他人一起等这个 Future
+        self._group_info_cache: Dict[str, _InfoCacheEntry] = {}
+        self._member_info_cache: Dict[Tuple[str, str], _InfoCacheEntry] = {}
+        self._image_base64_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._image_inflight: Dict[str, asyncio.Future] = {}
+        self._forward_cache: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        # 正在拉取的合并转发，同一个 forward_id 同时只问 Napcat 一次
+        self._forward_inflight: Dict[str, asyncio.Future] = {}
+        # 每收到一次健康的心跳就 set 一下，check_heartbeat 只在心跳来了或者超时的时候才醒
+        self._heartbeat_event: asyncio.Event = asyncio.Event()
+        # 同一时间只留一个心跳监视任务，Napcat 重连时旧的要先停掉
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        # post_type -> 对应“化妆师”的 execute，绑定好的方法只取一次，每个事件直接查表调用
+        self._dispatch: Dict[str, Callable[..., Awaitable[None]]] = {
+            post_type: handler.execute for post_type, handler in EVENT_HANDLERS.items()
+        }
+
+    async def process_event(
+        self, napcat_event: dict, raw_json: Optional[str] = None
+    ) -> None:
+        """我唯一的任务，就是优雅地分派任务给我的“化妆师”们~ raw_json 是这个事件的原始帧，有就顺手带上。"""
         post_type = napcat_event.get("post_type")
-        handler = get_event_handler(post_type)
-        if handler:
-            await handler.execute(napcat_event, self)
+        execute = self._dispatch.get(post_type)
+        if execute is not None:
+            await execute(napcat_event, self, raw_json)
         else:
             logger.warning(
-                f"接收处理器: 不认识的事件类型 '{post_type}'，不知道该怎么玩呢~"
+                "接收处理器: 不认识的事件类型 '{}'，不知道该怎么玩呢~", post_type
             )
 
     # --- 以下是必须保留的“感官”和“技能”，供“化妆师”们使用 ---
 
+    def _publish_bot_id(self, bot_id: str) -> None:
+        """拿到 Bot ID 后，一次性发布给 message_queue 和通信层，大家直接读就好~"""
+        self.napcat_bot_id = bot_id
+        message_queue.CURRENT_BOT_ID = bot_id
+        # 就是这里！通过 self.router 把爱（bot_id）注入到通信层！
+        if self.router:
+            self.router.update_bot_id(bot_id)
+
     async def _get_bot_id(self) -> Optional[str]:
         """获取我的ID，得不到就再试一次，一定要得到主人嘛~"""
-        # 检查配置中是否强制指定了 Bot ID
-        cfg = get_config()
-        if cfg.force_self_id:
-            forced_id = str(cfg.force_self_id).strip()
-            if forced_id:
-                self.napcat_bot_id = forced_id
-                logger.info(f"已从配置中强制指定 Bot ID: {self.napcat_bot_id}")
-                # 就是这里！通过 self.router 把爱（bot_id）注入到通信层！
-                if self.router:
-                    self.router.update_bot_id(self.napcat_bot_id)
-                return self.napcat_bot_id
+        # 检查配置中是否强制指定了 Bot ID；已经发布过就不用再发一遍
+        forced_id = self._forced_bot_id
+        if forced_id:
+            if self.napcat_bot_id != forced_id:
+                self._publish_bot_id(forced_id)
+                logger.info(f"已从配置中强制指定 Bot ID: {forced_id}")
+            return forced_id
 
         if self.napcat_bot_id:
             return self.napcat_bot_id
@@ -79,10 +155,8 @@ class RecvHandlerAicarus:
             logger.info(f"尝试获取 Bot ID (第 {attempt + 1}/{max_retries} 次)...")
             self_info = await napcat_get_self_info(self.server_connection)
             if self_info and self_info.get("user_id"):
-                self.napcat_bot_id = str(self_info.get("user_id"))
+                self._publish_bot_id(str(self_info.get("user_id")))
                 logger.info(f"成功获取 Bot ID: {self.napcat_bot_id}")
-                if self.router:
-                    self.router.update_bot_id(self.napcat_bot_id)
                 return self.napcat_bot_id
 
             logger.warning(
@@ -96,47 +170,98 @@ class RecvHandlerAicarus:
 
         return None
 
-    async def _napcat_to_aicarus_userinfo(
-        self, napcat_user_obj: dict, group_id: Optional[str] = None
-    ) -> UserInfo:
-        """把Napcat的用户信息，变成我喜欢的、丰满的样子~ (已阉割platform)"""
-        user_id = str(napcat_user_obj.get("user_id", ""))
-        nickname = napcat_user_obj.get("nickname")
-        cardname = napcat_user_obj.get("card")
-        permission_level = None
-        role = None
-        title = None
+    async def _cached_fetch(
+        self,
+        cache: Dict[Any, _InfoCacheEntry],
+        key: Hashable,
+        ttl: float,
+        fetch: Callable[[], Awaitable[Optional[Dict[str, Any]]]],
+    ) -> Optional[Dict[str, Any]]:
+        """带过期时间的查询缓存，并发的同 key 查询会合并成一次。查询失败（None）不缓存。
+
+        dict 按插入顺序排，条目超过上限时从最早放进去的开始丢。
+        """
+        entry = cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            # shield 一下，免得某个等待者被取消时把大家共用的 Future 也取消掉
+            return await asyncio.shield(entry[1])
+
+        future = asyncio.get_running_loop().create_future()
+        # 先 pop 再放，过期重查的 key 会排到最后面，不会被当成最老的先丢掉
+        cache.pop(key, None)
+        cache[key] = (float("inf"), future)
+        if len(cache) > self._info_cache_max:
+            cache.pop(next(iter(cache)))
+        result: Optional[Dict[str, Any]] = None
+        try:
+            result = await fetch()
+        finally:
+            if result is not None:
+                cache[key] = (time.monotonic() + ttl, future)
+            elif cache.get(key, (0.0, None))[1] is future:
+                cache.pop(key, None)
+            future.set_result(result)
+        return result
+
+    def invalidate_group_cache(
+        self, group_id: str, user_id: Optional[str] = None
+    ) -> None:
+        """群里有人进出、升降管理、改名片之后，把对应的缓存丢掉，下次重新问 Napcat。"""
+        if user_id:
+            self._member_info_cache.pop((group_id, user_id), None)
+        else:
+            self._group_info_cache.pop(group_id, None)
 
-        if group_id and user_id and self.server_connection:
-            member_data = await napcat_get_member_info(
-                self.server_connection, group_id, user_id
+    def _build_userinfo(
+        self,
+        napcat_user_obj: dict,
+        member_data: Optional[Dict[str, Any]] = None,
+    ) -> UserInfo:
+        """只用手上已有的数据拼出 UserInfo，不问 Napcat。私聊的发送者直接用这个就够了。
+
+        member_data 是查到的群成员信息，有的话名片、昵称、头衔、权限都以它为准。
+        """
+        get = napcat_user_obj.get
+        nickname, cardname = get("nickname"), get("card")
+        permission_level = role = title = None
+        if member_data:
+            cardname = member_data.get("card") or cardname
+            nickname = member_data.get("nickname") or nickname
+            title = member_data.get("title")
+            permission_level, role = _NAPCAT_GROUP_ROLES.get(
+                member_data.get("role"), _MEMBER_ROLE
             )
-            if member_data:
-                cardname = member_data.get("card") or cardname
-                nickname = member_data.get("nickname") or nickname
-                title = member_data.get("title")
-                napcat_role = member_data.get("role")
-                if napcat_role == "owner":
-                    permission_level = "owner"
-                    role = "owner"
-                elif napcat_role == "admin":
-                    permission_level = "admin"
-                    role = "admin"
-                else:
-                    permission_level = "member"
-                    role = "member"
 
         # --- ❤❤❤ 看这里！UserInfo的构造器里已经没有platform了！❤❤❤ ---
         return UserInfo(
-            user_id=user_id,
+            user_id=qq_id_str(get("user_id", "")),
             user_nickname=nickname,
             user_cardname=cardname,
             user_titlename=title,
             permission_level=permission_level,
             role=role,
-            additional_data=napcat_user_obj.get("additional_data", {}),
+            additional_data=get("additional_data") or _EMPTY_ADDITIONAL_DATA,
         )
 
+    async def _napcat_to_aicarus_userinfo(
+        self, napcat_user_obj: dict, group_id: Optional[str] = None
+    ) -> UserInfo:
+        """把Napcat的用户信息，变成我喜欢的、丰满的样子~ (已阉割platform)
+
+        给了 group_id 才会去查（带缓存的）群成员信息来补全，其余都交给 _build_userinfo。
+        """
+        user_id = qq_id_str(napcat_user_obj.get("user_id", ""))
+        member_data: Optional[Dict[str, Any]] = None
+        if group_id and user_id and self.server_connection:
+            server_connection = self.server_connection
+            member_data = await self._cached_fetch(
+                self._member_info_cache,
+                (group_id, user_id),
+                self._member_info_ttl,
+                lambda: napcat_get_member_info(server_connection, group_id, user_id),
+            )
+        return self._build_userinfo(napcat_user_obj, member_data)
+
     async def _napcat_to_aicarus_conversationinfo(
         self, napcat_group_id: str
     ) -> Optional[ConversationInfo]:
@@ -148,8 +273,12 @@ class RecvHandlerAicarus:
                 type=ConversationType.GROUP,
             )
 
-        group_data = await napcat_get_group_info(
-            self.server_connection, napcat_group_id
+        server_connection = self.server_connection
+        group_data = await self._cached_fetch(
+            self._group_info_cache,
+            napcat_group_id,
+            self._group_info_ttl,
+            lambda: napcat_get_group_info(server_connection, napcat_group_id),
         )
         group_name = group_data.get("group_name") if group_data else None
         # --- ❤❤❤ 这里也没有platform了！❤❤❤ ---
@@ -172,182 +301,349 @@ class RecvHandlerAicarus:
             name=napcat_user_info.user_nickname,
         )
 
-    async def _napcat_to_aicarus_seglist(
-        self, napcat_segments: List[Dict[str, Any]], napcat_event: dict
-    ) -> List[Seg]:
-        """这是我最棒的“脱衣服”工具，能把Napcat发来的各种骚话，都变成主人喜欢的标准情话~ 无所不能哦！"""
-        aicarus_segs: List[Seg] = []
+    async def _prefetch_image_base64(
+        self, napcat_segments: List[Dict[str, Any]]
+    ) -> Dict[str, Optional[str]]:
+        """把一条消息里所有图片一起下载好，返回 url -> base64。N 张图的耗时是最慢那张，而不是加起来。"""
+        if not self._image_base64_enabled:
+            return _NO_IMAGES
+        # url -> 缓存 key。同一张图每次发出来 url 都可能不一样（带临时签名），file 才是它的身份
+        wanted: Dict[str, str] = {}
         for seg in napcat_segments:
-            seg_type = seg.get("type")
-            seg_data = seg.get("data", {})
-            aicarus_s: Optional[Seg] = None
-
-            if seg_type == NapcatSegType.text:
-                aicarus_s = Seg(type="text", data={"text": seg_data.get("text", "")})
-
-            elif seg_type == NapcatSegType.face:
-                face_id = seg_data.get("id")
-                face_name = qq_face.get(face_id, f"[未知表情:{face_id}]")
-                aicarus_s = Seg(type="face", data={"id": face_id, "name": face_name})
-
-            elif seg_type == NapcatSegType.image:
-                image_url = seg_data.get("url")
-                image_base64 = None
-                if image_url:
-                    try:
-                        # 主人，我要开始下载图片转成热乎的base64了哦，可能会有点慢~
-                        image_base64 = await get_image_base64_from_url(image_url)
-                    except Exception as e:
-                        logger.error(f"处理图片高潮时发生错误: {e}")
-                if seg_data.get("summary", "[图片]") == "[动画表情]":
-                    # 如果是动画表情，就用特殊的标记
-                    summary = "sticker"
-                else:
-                    summary = "image"
-                aicarus_s = Seg(
-                    type="image",
-                    data={
-                        "url": image_url,
-                        "file_id": seg_data.get("file"),
-                        "base64": image_base64,
-                        "summary": summary,
-                    },
-                )
+            if seg.get("type") == _IMAGE_SEG_TYPE:
+                seg_data = seg.get("data", {})
+                url = seg_data.get("url")
+                if url:
+                    wanted[url] = seg_data.get("file") or url
+        if not wanted:
+            return {}
+
+        fetched = await asyncio.gather(
+            *(self._fetch_image_base64(key, url) for url, key in wanted.items())
+        )
+        return dict(zip(wanted, fetched))
+
+    async def _fetch_image_base64(self, key: str, url: str) -> Optional[str]:
+        """按 key 取一张图的 base64：先看 LRU 缓存，同一张图正在下载就一起等，都没有才真的去下。下载失败不缓存。"""
+        cached = self._image_base64_cache.get(key)
+        if cached is not None:
+            self._image_base64_cache.move_to_end(key)
+            return cached
+
+        inflight = self._image_inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._image_inflight[key] = future
+        image_base64: Optional[str] = None
+        try:
+            image_base64 = await get_image_base64_from_url(url)
+        except Exception as e:
+            logger.error(f"处理图片高潮时发生错误: {e}")
+        finally:
+            self._image_inflight.pop(key, None)
+            if image_base64 is not None:
+                self._image_base64_cache[key] = image_base64
+                if len(self._image_base64_cache) > IMAGE_BASE64_CACHE_SIZE:
+                    self._image_base64_cache.popitem(last=False)
+            future.set_result(image_base64)
+        return image_base64
+
+    async def _get_forward_content(
+        self, forward_id: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """取合并转发的内容，先看 LRU 缓存，没有再去问 Napcat。拉取失败（None）不缓存。"""
+        cached = self._forward_cache.get(forward_id)
+        if cached is not None:
+            self._forward_cache.move_to_end(forward_id)
+            return cached
+
+        inflight = self._forward_inflight.get(forward_id)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._forward_inflight[forward_id] = future
+        content: Optional[List[Dict[str, Any]]] = None
+        try:
+            content = await napcat_get_forward_msg_content(
+                self.server_connection, forward_id
+            )
+        finally:
+            self._forward_inflight.pop(forward_id, None)
+            if content:
+                self._forward_cache[forward_id] = content
+                if len(self._forward_cache) > FORWARD_CACHE_SIZE:
+                    self._forward_cache.popitem(last=False)
+            future.set_result(content)
+        return content
+
+    # --- 各种消息段的“脱衣服”手法，一种类型一个，由 _napcat_to_aicarus_seglist 按表分派 ---
+    # 统一签名：(seg_data, 预先下载好的图片 base64)。只有需要等 Napcat 的才是 async。
+
+    def _convert_text_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        text = seg_data.get("text")
+        return Seg(type="text", data={"text": text} if text else _EMPTY_TEXT_DATA)
+
+    def _convert_face_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        face_id = seg_data.get("id")
+        # 不把 f-string 当 get 的默认值：默认值每次都会先算出来，认识的表情（大多数）就白拼了
+        face_name = _qq_face_get(face_id)
+        if face_name is None:
+            face_name = f"[未知表情:{face_id}]"
+        return Seg(type="face", data={"id": face_id, "name": face_name})
+
+    def _convert_image_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        image_url = seg_data.get("url")
+        image_base64 = images.get(image_url) if image_url else None
+        if seg_data.get("summary", "[图片]") == "[动画表情]":
+            # 如果是动画表情，就用特殊的标记
+            summary = "sticker"
+        else:
+            summary = "image"
+        return Seg(
+            type="image",
+            data={
+                "url": image_url,
+                "file_id": seg_data.get("file"),
+                "base64": image_base64,
+                "summary": summary,
+            },
+        )
 
-            elif seg_type == NapcatSegType.at:
-                qq_num = seg_data.get("qq")
-                display_name = (
-                    f"@{qq_num}" if qq_num and qq_num != "all" else "@全体成员"
-                )
-                aicarus_s = Seg(
-                    type="at",
-                    data={
-                        "user_id": str(qq_num) if qq_num else "",
-                        "display_name": display_name,
-                    },
-                )
+    def _convert_at_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        qq_num = seg_data.get("qq")
+        if qq_num == "all":
+            return Seg(type="at", data=_AT_ALL_DATA)
+        if not qq_num:
+            return Seg(type="at", data={"user_id": "", "display_name": "@全体成员"})
+        return Seg(
+            type="at", data={"user_id": qq_id_str(qq_num), "display_name": f"@{qq_num}"}
+        )
 
-            elif seg_type == NapcatSegType.reply:
-                # 哼，小猫咪要在这里做更精细的活儿了~
-                # 我们不仅要知道回复了哪条消息，还要知道是谁发的，说了啥！
-                quote_info = seg_data  # 在Napcat中，reply seg的data就是引用信息的全部
-                aicarus_s = Seg(
-                    type="quote",  # 我决定用 "quote" 这个更明确的类型
-                    data={
-                        "message_id": quote_info.get("id"),
-                        "user_id": str(quote_info.get("qq"))
-                        if quote_info.get("qq")
-                        else None,
-                        "nickname": quote_info.get("name"),
-                        "content": quote_info.get("text"),  # 被引用的内容摘要
-                        "time": quote_info.get("time"),
-                    },
-                )
+    def _convert_reply_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        # 哼，小猫咪要在这里做更精细的活儿了~
+        # 我们不仅要知道回复了哪条消息，还要知道是谁发的，说了啥！
+        get = seg_data.get  # 在Napcat中，reply seg的data就是引用信息的全部
+        quoted_qq = get("qq")
+        return Seg(
+            type="quote",  # 我决定用 "quote" 这个更明确的类型
+            data={
+                "message_id": get("id"),
+                "user_id": qq_id_str(quoted_qq) if quoted_qq else None,
+                "nickname": get("name"),
+                "content": get("text"),  # 被引用的内容摘要
+                "time": get("time"),
+            },
+        )
 
-            elif seg_type == NapcatSegType.record:
-                aicarus_s = Seg(
-                    type="record",
-                    data={"file": seg_data.get("file"), "url": seg_data.get("url")},
-                )
+    def _convert_record_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        return Seg(
+            type="record",
+            data={"file": seg_data.get("file"), "url": seg_data.get("url")},
+        )
 
-            elif seg_type == NapcatSegType.video:
-                aicarus_s = Seg(
-                    type="video",
-                    data={"file": seg_data.get("file"), "url": seg_data.get("url")},
-                )
+    def _convert_video_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        return Seg(
+            type="video",
+            data={"file": seg_data.get("file"), "url": seg_data.get("url")},
+        )
 
-            elif seg_type == NapcatSegType.forward:
-                forward_id = seg_data.get("id")
-                forward_content = None
-                if forward_id and self.server_connection:
-                    try:
-                        # 深入进去，把合并消息的内容都掏出来给你看！
-                        forward_content = await napcat_get_forward_msg_content(
-                            self.server_connection, forward_id
-                        )
-                    except Exception as e:
-                        logger.warning(f"获取合并转发内容失败了啦: {e}")
-
-                if forward_content:
-                    aicarus_s = Seg(
-                        type="forward",
-                        data={"id": forward_id, "content": forward_content},
-                    )
-                else:
-                    aicarus_s = Seg(
-                        type="text", data={"text": "[合并转发消息(获取失败)]"}
-                    )
-
-            elif seg_type == NapcatSegType.json:
-                aicarus_s = Seg(
-                    type="json_card", data={"content": seg_data.get("data", "{}")}
-                )
+    async def _convert_forward_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        forward_id = seg_data.get("id")
+        forward_content = None
+        if forward_id and self.server_connection:
+            try:
+                # 深入进去，把合并消息的内容都掏出来给你看！
+                forward_content = await self._get_forward_content(forward_id)
+            except Exception as e:
+                logger.warning(f"获取合并转发内容失败了啦: {e}")
+
+        if forward_content:
+            return Seg(
+                type="forward",
+                data={"id": forward_id, "content": forward_content},
+            )
+        return Seg(type="text", data=_FORWARD_FALLBACK_DATA)
+
+    def _convert_json_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        return Seg(type="json_card", data={"content": seg_data.get("data", "{}")})
+
+    def _convert_xml_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        return Seg(type="xml_card", data={"content": seg_data.get("data", "")})
+
+    def _convert_share_seg(
+        self, seg_data: Dict[str, Any], images: Dict[str, Optional[str]]
+    ) -> Seg:
+        return Seg(
+            type="share",
+            data={
+                "url": seg_data.get("url", ""),
+                "title": seg_data.get("title", ""),
+                "content": seg_data.get("content", ""),
+                "image_url": seg_data.get("image", ""),
+            },
+        )
 
-            elif seg_type == NapcatSegType.xml:
-                aicarus_s = Seg(
-                    type="xml_card", data={"content": seg_data.get("data", "")}
-                )
+    # 分派表：Napcat 原始类型字符串 -> (是否 async, 转换方法)。每个消息段只查一次表，
+    # 不用一路 elif 比下去。Enum 成员按名字算 hash，所以 key 用 .value，拿原始字符串直接查
+    _SEG_CONVERTERS: Dict[str, Tuple[bool, Callable[..., Any]]] = {
+        seg_type.value: entry
+        for seg_type, entry in (
+            (NapcatSegType.text, (False, _convert_text_seg)),
+            (NapcatSegType.face, (False, _convert_face_seg)),
+            (NapcatSegType.image, (False, _convert_image_seg)),
+            (NapcatSegType.at, (False, _convert_at_seg)),
+            (NapcatSegType.reply, (False, _convert_reply_seg)),
+            (NapcatSegType.record, (False, _convert_record_seg)),
+            (NapcatSegType.video, (False, _convert_video_seg)),
+            (NapcatSegType.json, (False, _convert_json_seg)),
+            (NapcatSegType.xml, (False, _convert_xml_seg)),
+            (NapcatSegType.share, (False, _convert_share_seg)),
+            (NapcatSegType.forward, (True, _convert_forward_seg)),
+        )
+    }
 
-            elif seg_type == NapcatSegType.share:
-                aicarus_s = Seg(
-                    type="share",
-                    data={
-                        "url": seg_data.get("url", ""),
-                        "title": seg_data.get("title", ""),
-                        "content": seg_data.get("content", ""),
-                        "image_url": seg_data.get("image", ""),
-                    },
-                )
-            else:
-                # 就算不认识，我也会帮你包起来~
-                logger.warning(
-                    f"不认识的Napcat消息体: {seg_type}，我会帮你特别标记出来的~"
-                )
-                aicarus_s = Seg(
-                    type="unknown",
-                    data={"napcat_type": seg_type, "napcat_data": seg_data},
-                )
+    def _convert_unknown_seg(self, raw_seg_type: Any, seg_data: Dict[str, Any]) -> Seg:
+        # 就算不认识，我也会帮你包起来~
+        logger.warning(
+            "不认识的Napcat消息体: {}，我会帮你特别标记出来的~", raw_seg_type
+        )
+        return Seg(
+            type="unknown",
+            data={"napcat_type": raw_seg_type, "napcat_data": seg_data},
+        )
 
-            if aicarus_s:
-                aicarus_segs.append(aicarus_s)
+    def _napcat_to_aicarus_seglist_sync(
+        self, napcat_segments: List[Dict[str, Any]]
+    ) -> Optional[List[Seg]]:
+        """不用等任何东西的消息直接同步转换完；里面有合并转发（或者要下载 base64 的图片）就返回 None，交给 async 版本。"""
+        async_seg_types = self._async_seg_types
+        if any(seg.get("type") in async_seg_types for seg in napcat_segments):
+            return None
+        # 每个消息段正好转出一个 Seg，直接 append 就好（比先开 [None] * n 再按下标填还快），
+        # 只是把 append 取成局部变量
+        aicarus_segs: List[Seg] = []
+        append = aicarus_segs.append
+        converters = self._SEG_CONVERTERS
+        for seg in napcat_segments:
+            raw_seg_type = seg.get("type")
+            seg_data = seg.get("data", {})
+            entry = converters.get(raw_seg_type)
+            append(
+                entry[1](self, seg_data, _NO_IMAGES)
+                if entry is not None
+                else self._convert_unknown_seg(raw_seg_type, seg_data)
+            )
         return aicarus_segs
 
+    async def _napcat_to_aicarus_seglist(
+        self, napcat_segments: List[Dict[str, Any]], napcat_event: dict
+    ) -> List[Seg]:
+        """这是我最棒的“脱衣服”工具，能把Napcat发来的各种骚话，都变成主人喜欢的标准情话~ 无所不能哦！"""
+        sync_segs = self._napcat_to_aicarus_seglist_sync(napcat_segments)
+        if sync_segs is not None:
+            return sync_segs
+
+        converters = self._SEG_CONVERTERS
+        # 第一遍：把要等 Napcat 的消息段（合并转发）都找出来，和图片下载一起发出去，
+        # 几个转发 + 几张图的总耗时只取最慢的那个，而不是一个一个加起来
+        async_convs = []
+        for seg in napcat_segments:
+            entry = converters.get(seg.get("type"))
+            if entry is not None and entry[0]:
+                async_convs.append(entry[1](self, seg.get("data", {}), _NO_IMAGES))
+        # 主人，我要先把所有图片一起下载转成热乎的base64了哦，这样就不会一张一张慢慢等啦~
+        image_base64_by_url, *async_results = await asyncio.gather(
+            self._prefetch_image_base64(napcat_segments), *async_convs
+        )
+
+        # 第二遍：按原来的顺序拼起来，异步的直接取上面等好的结果
+        async_results_iter = iter(async_results)
+        aicarus_segs: List[Seg] = []
+        append = aicarus_segs.append
+        for seg in napcat_segments:
+            raw_seg_type = seg.get("type")
+            seg_data = seg.get("data", {})
+
+            entry = converters.get(raw_seg_type)
+            if entry is None:
+                append(self._convert_unknown_seg(raw_seg_type, seg_data))
+            elif entry[0]:
+                append(next(async_results_iter))
+            else:
+                append(entry[1](self, seg_data, image_base64_by_url))
+        return aicarus_segs
+
+    def mark_heartbeat(self) -> None:
+        """记下一次健康的心跳，顺便叫醒正在等心跳的 check_heartbeat。"""
+        # 只拿来算间隔，用单调时钟，不怕系统时间被 NTP 或手动调整
+        self.last_heart_beat = time.monotonic()
+        self._heartbeat_event.set()
+
+    def start_heartbeat_monitor(self, bot_id: str) -> None:
+        """（重新）开始盯心跳。每次 lifecycle.connect 都会调，旧的监视任务先取消，免得越攒越多。"""
+        if self._heartbeat_task is not None and not self._heartbeat_task.done():
+            self._heartbeat_task.cancel()
+        self._heartbeat_task = asyncio.create_task(self.check_heartbeat(bot_id))
+
     async def check_heartbeat(self, bot_id: str) -> None:
         """我会一直盯着你的心跳，确保你一直为我而“活”着~"""
+        # 循环里不变的东西先准备好；interval 会被 Napcat 的心跳更新，所以超时时间每轮现算
+        heartbeat_event = self._heartbeat_event
+        wait_for = asyncio.wait_for
+        disconnect_event_type = f"meta.{self.platform_id}.lifecycle.disconnect"
         while True:
-            await asyncio.sleep(self.interval)
-            if (
-                self.server_connection
-                and time.time() - self.last_heart_beat > self.interval + 5
-            ):
+            try:
+                await wait_for(heartbeat_event.wait(), timeout=self.interval + 5)
+                heartbeat_event.clear()
+                logger.debug("你的心跳很强劲呢，主人~ ({})", bot_id)
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            if self.server_connection:
                 logger.warning("主人，连接好像要断了 (心跳超时)，我要发出断连呻吟了！")
 
                 # --- ❤❤❤ 这里也要用新的方式构造！❤❤❤ ---
-                platform_id = self.global_config.core_platform_id
-                disconnect_event_type = f"meta.{platform_id}.lifecycle.disconnect"
-
-                disconnect_seg = Seg(
-                    type="meta.lifecycle.disconnect",
-                    data={"reason": "heartbeat_timeout", "adapter_version": "2.0.0"},
-                )
+                # 每次只有 ID 和时间不一样，内容段用现成的
                 disconnect_event = Event(
-                    event_id=f"meta_disconnect_{uuid.uuid4()}",
+                    event_id=new_event_id("meta_disconnect"),
                     event_type=disconnect_event_type,
-                    time=time.time() * 1000.0,
+                    time=now_ms(),
                     bot_id=bot_id,
                     user_info=None,
                     conversation_info=None,
-                    content=[disconnect_seg],
+                    content=[_HEARTBEAT_TIMEOUT_SEG],
                 )
                 await self.dispatch_to_core(disconnect_event)
                 break
-            else:
-                logger.debug(f"你的心跳很强劲呢，主人~ ({bot_id})")
 
     async def dispatch_to_core(self, event: Event):
         """将我精心构造的、充满爱意的事件，发射给核心~ 让核心也感受我的体温！"""
         if self.router:
-            logger.info(f"发射爱意 -> {event.event_type} (ID: {event.event_id})")
+            logger.info("发射爱意 -> {} (ID: {})", event.event_type, event.event_id)
             await self.router.send_event_to_core(event.to_dict())
 
 
@@ -1,13 +1,12 @@
 # aicarus_napcat_adapter/src/send_handler_aicarus.py (小色猫·最终高潮版)
 from typing import List, Dict, Any, Optional, Tuple, Callable
-import json
-import uuid
 import websockets
 import asyncio
 
 # 内部模块
 from .logger import logger
 from .message_queue import get_napcat_api_response
+from .utils import dumps_json, new_event_id
 from .recv_handler_aicarus import recv_handler_aicarus
 from .action_definitions import get_action_handler
 from .napcat_definitions import NapcatSegType
@@ -189,7 +188,9 @@ class SendHandlerAicarus:
         try:
             aicarus_event = Event.from_dict(raw_aicarus_event_dict)
         except Exception as e:
-            logger.error(f"发送处理器: 解析核心命令时，身体出错了: {e}", exc_info=True)
+            logger.opt(exception=True).error(
+                f"发送处理器: 解析核心命令时，身体出错了: {e}"
+            )
             return
 
         logger.info(
@@ -262,8 +263,8 @@ class SendHandlerAicarus:
             return False, error_msg, {}
 
         except Exception as e:
-            logger.error(
-                f"执行动作 '{action_alias}' 时，身体不听使唤了: {e}", exc_info=True
+            logger.opt(exception=True).error(
+                f"执行动作 '{action_alias}' 时，身体不听使唤了: {e}"
             )
             return False, f"执行动作时出现异常: {e}", {}
 
@@ -335,11 +336,11 @@ class SendHandlerAicarus:
         """将我们的欲望（API请求）安全地射向Napcat，并焦急地等待它的呻吟（响应）"""
         if not self.server_connection:
             return {"status": "error", "message": "和Napcat的连接断开了，没法射呢..."}
-        request_uuid = str(uuid.uuid4())
-        payload = {"action": action, "params": params, "echo": request_uuid}
-        await self.server_connection.send(json.dumps(payload))
+        request_echo_id = new_event_id("echo")
+        payload = {"action": action, "params": params, "echo": request_echo_id}
+        await self.server_connection.send(dumps_json(payload))
         try:
-            return await get_napcat_api_response(request_uuid, timeout_seconds=30.0)
+            return await get_napcat_api_response(request_echo_id, timeout_seconds=30.0)
         except asyncio.TimeoutError:
             logger.warning(f"调用 Napcat API '{action}' 超时。")
             return {"status": "error", "message": f"调用 Napcat API '{action}' 超时"}
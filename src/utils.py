@@ -2,14 +2,22 @@
 # Adapter 项目专属的工具函数，主要用于与 Napcat API 交互
 from typing import Dict, Any, Optional, Union, List
 import asyncio
+import itertools
+from functools import lru_cache
 import json
-import uuid
+import os
+import time
 import aiohttp
 import ssl
 import base64
 import io
 from PIL import Image  # 用于图片格式处理
 
+try:
+    import orjson  # 可选的加速依赖，没装的话就退回标准库 json
+except ImportError:
+    orjson = None  # type: ignore
+
 # 从同级目录导入
 try:
     from .logger import logger
@@ -19,17 +27,21 @@ try:
 except ImportError:
 
     class FallbackLogger:
-        def info(self, msg: str):
-            print(f"INFO (utils.py): {msg}")
+        # 和 loguru 一样支持 "{}" 占位的参数；没带参数就原样输出，消息里本来的花括号不受影响
+        def info(self, msg: str, *args: Any):
+            print(f"INFO (utils.py): {msg.format(*args) if args else msg}")
 
-        def warning(self, msg: str):
-            print(f"WARNING (utils.py): {msg}")
+        def warning(self, msg: str, *args: Any):
+            print(f"WARNING (utils.py): {msg.format(*args) if args else msg}")
 
-        def error(self, msg: str):
-            print(f"ERROR (utils.py): {msg}")
+        def error(self, msg: str, *args: Any):
+            print(f"ERROR (utils.py): {msg.format(*args) if args else msg}")
 
-        def debug(self, msg: str):
-            print(f"DEBUG (utils.py): {msg}")
+        def debug(self, msg: str, *args: Any):
+            print(f"DEBUG (utils.py): {msg.format(*args) if args else msg}")
+
+        def opt(self, **kwargs: Any) -> "FallbackLogger":
+            return self
 
     logger = FallbackLogger()  # type: ignore
 
@@ -41,6 +53,83 @@ except ImportError:
         return {"status": "error", "message": "Fallback response from utils.py"}
 
 
+# --- 事件循环 ---
+
+
+def install_uvloop() -> bool:
+    """如果装了 uvloop，就把默认事件循环换成它。必须在 asyncio.run 之前调用。"""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+# --- 事件 ID ---
+
+# 事件 ID 只要在本进程里唯一就够了：进程号 + 启动时间做前缀，后面接一个自增计数，
+# 比每个事件都 uuid4() 一次（读 /dev/urandom 再格式化）便宜得多，也更短
+_event_id_prefix = f"{os.getpid()}{int(time.time())}"
+_event_id_counter = itertools.count()
+
+
+def new_event_id(kind: str) -> str:
+    """生成一个进程内唯一的事件 ID，形如 "{kind}_{前缀}_{序号}"。"""
+    return f"{kind}_{_event_id_prefix}_{next(_event_id_counter)}"
+
+
+@lru_cache(maxsize=8192)
+def _cached_id_str(value: Union[int, str]) -> str:
+    return str(value)
+
+
+def qq_id_str(value: Any) -> str:
+    """把 QQ 号 / 群号转成字符串。活跃的人和群就那么些，转过的直接复用同一个 str。
+
+    Napcat 有时会把字段给成 null，这时候 get 的默认值不起作用；None 一律当成空字符串，
+    免得 str(None) 变成一个叫 "None" 的 QQ 号。
+    """
+    if value is None:
+        return ""
+    # 只有 int / str 走缓存：缓存按相等判断，1、1.0、True 会撞到同一条；
+    # 坏数据里的 list / dict 又不能哈希。其他类型老老实实直接 str
+    value_type = type(value)
+    if value_type is int or value_type is str:
+        return _cached_id_str(value)
+    return str(value)
+
+
+def now_ms() -> int:
+    """当前时间的毫秒时间戳（整数）。走 time_ns 整除，不经过浮点乘法。"""
+    return time.time_ns() // 1_000_000
+
+
+# --- JSON 编解码辅助函数 ---
+
+
+def dumps_json(obj: Any) -> str:
+    """把对象序列化成 JSON 字符串，中文原样保留。装了 orjson 就用它，快得多。"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def dumps_json_bytes(obj: Any) -> bytes:
+    """和 dumps_json 一样，但直接返回 UTF-8 bytes。orjson 本来就产出 bytes，省一次 decode。"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """解析 JSON，str 和 bytes 都能直接吃。解析失败时抛出 json.JSONDecodeError。"""
+    if orjson is not None:
+        # orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+        return orjson.loads(data)
+    return json.loads(data)
+
+
 # --- Napcat API 调用辅助函数 ---
 # 注意：所有这些函数都需要一个已建立的 WebSocket 连接 (server_connection) 作为参数
 
@@ -69,14 +158,18 @@ async def _call_napcat_api(
         logger.error(f"无法调用 Napcat API '{action}': WebSocket 连接不可用或已关闭。")
         return None
 
-    request_echo_id = str(uuid.uuid4())
+    request_echo_id = new_event_id("echo")
     payload = {"action": action, "params": params, "echo": request_echo_id}
 
     try:
+        # 每次查群信息、成员信息都会走到这里，debug 日志交给 loguru 按需格式化
         logger.debug(
-            f"向 Napcat 发送 API 请求: action='{action}', params={params}, echo='{request_echo_id}'"
+            "向 Napcat 发送 API 请求: action='{}', params={}, echo='{}'",
+            action,
+            params,
+            request_echo_id,
         )
-        await server_connection.send(json.dumps(payload))
+        await server_connection.send(dumps_json(payload))
 
         # 等待响应
         response_data = await get_napcat_api_response(
@@ -84,8 +177,12 @@ async def _call_napcat_api(
         )
 
         if response_data and response_data.get("status") == "ok":
+            # 响应可能很大（比如合并转发的整棵树），没开 DEBUG 时千万别先拼成字符串
             logger.debug(
-                f"Napcat API '{action}' (echo: {request_echo_id}) 调用成功。响应: {response_data.get('data')}"
+                "Napcat API '{}' (echo: {}) 调用成功。响应: {}",
+                action,
+                request_echo_id,
+                response_data.get("data"),
             )
             # 即使 data 字段不存在，也返回一个空字典表示成功
             return (
@@ -111,9 +208,8 @@ async def _call_napcat_api(
         )
         return None
     except Exception as e:
-        logger.error(
+        logger.opt(exception=True).error(
             f"调用 Napcat API '{action}' (echo: {request_echo_id}) 时发生异常: {e}",
-            exc_info=True,
         )
         return None
 
@@ -256,30 +352,56 @@ async def napcat_get_group_msg_history(
 # --- 图片处理工具函数 ---
 
 
-async def get_image_base64_from_url(url: str, timeout: int = 10) -> Optional[str]:
-    """异步从 URL 下载图片并返回其 Base64 编码。"""
-    # 创建 SSL 上下文以兼容某些服务器
-    ssl_context = ssl.create_default_context()
-    ssl_context.set_ciphers("DEFAULT@SECLEVEL=1")  # 有时需要降低安全级别以兼容旧服务器
+# 下载图片共用一个 HTTP 会话：连到 QQ 图床的连接会被复用，不用每张图都重新握手
+_image_http_session: Optional[aiohttp.ClientSession] = None
+
+
+def _get_image_http_session() -> aiohttp.ClientSession:
+    """拿到共用的图片下载会话，第一次用（或者被关掉之后）才创建。必须在事件循环里调用。"""
+    global _image_http_session
+    if _image_http_session is None or _image_http_session.closed:
+        # 创建 SSL 上下文以兼容某些服务器
+        ssl_context = ssl.create_default_context()
+        # 有时需要降低安全级别以兼容旧服务器
+        ssl_context.set_ciphers("DEFAULT@SECLEVEL=1")
+        _image_http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(ssl=ssl_context, limit=64, ttl_dns_cache=300)
+        )
+    return _image_http_session
+
+
+async def close_image_http_session() -> None:
+    """关闭共用的图片下载会话，退出前调用一次。"""
+    global _image_http_session
+    if _image_http_session is not None and not _image_http_session.closed:
+        await _image_http_session.close()
+    _image_http_session = None
+
+
+async def get_image_base64_from_url(
+    url: str, timeout: int = 10, session: Optional[aiohttp.ClientSession] = None
+) -> Optional[str]:
+    """异步从 URL 下载图片并返回其 Base64 编码。不传 session 就用共用的那个。"""
+    if session is None:
+        session = _get_image_http_session()
 
     try:
-        async with aiohttp.ClientSession(
-            connector=aiohttp.TCPConnector(ssl=ssl_context)
-        ) as session:
-            async with session.get(url, timeout=timeout) as response:
-                if response.status == 200:
-                    image_bytes = await response.read()
-                    image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-                    logger.debug(f"成功下载并编码图片: {url}")
-                    return image_base64
-                else:
-                    logger.error(f"下载图片失败 (HTTP {response.status}): {url}")
-                    return None
+        async with session.get(
+            url, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            if response.status == 200:
+                image_bytes = await response.read()
+                image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+                logger.debug("成功下载并编码图片: {}", url)
+                return image_base64
+            else:
+                logger.error(f"下载图片失败 (HTTP {response.status}): {url}")
+                return None
     except asyncio.TimeoutError:
         logger.error(f"下载图片超时 (URL: {url}, 超时: {timeout}s)")
         return None
     except Exception as e:
-        logger.error(f"下载或处理图片时发生错误 (URL: {url}): {e}", exc_info=True)
+        logger.opt(exception=True).error(f"下载或处理图片时发生错误 (URL: {url}): {e}")
         return None
 
 
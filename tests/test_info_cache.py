@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aicarus_protocols")
+
+try:
+    from src import recv_handler_aicarus as recv_module
+    from src.config import AdapterConfigData
+except SystemExit:
+    # 第一次运行时 config.py 会先从模板生成 config.toml 然后退出，再跑一次就好
+    pytest.skip("config.toml 刚从模板生成，请重新运行测试", allow_module_level=True)
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setattr(recv_module, "get_config", lambda: AdapterConfigData({}))
+    return recv_module.RecvHandlerAicarus()
+
+
+def _counting_fetch(result):
+    """返回 (fetch, calls)：fetch 每被调一次 calls 就多一条，结果固定是 result。"""
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return result
+
+    return fetch, calls
+
+
+def test_cached_until_ttl_expires(handler):
+    cache = handler._group_info_cache
+    fetch, calls = _counting_fetch({"group_name": "猫窝"})
+
+    async def run():
+        first = await handler._cached_fetch(cache, "1", 3600.0, fetch)
+        second = await handler._cached_fetch(cache, "1", 3600.0, fetch)
+        return first, second
+
+    assert asyncio.run(run()) == ({"group_name": "猫窝"}, {"group_name": "猫窝"})
+    assert len(calls) == 1
+
+
+def test_expired_entry_is_fetched_again(handler):
+    cache = handler._group_info_cache
+    fetch, calls = _counting_fetch({"group_name": "猫窝"})
+
+    async def run():
+        # ttl 为 0：放进去的那一刻就已经过期
+        await handler._cached_fetch(cache, "1", 0.0, fetch)
+        await handler._cached_fetch(cache, "1", 0.0, fetch)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_failed_fetch_is_not_cached(handler):
+    cache = handler._group_info_cache
+    fetch, calls = _counting_fetch(None)
+
+    async def run():
+        assert await handler._cached_fetch(cache, "1", 3600.0, fetch) is None
+        assert await handler._cached_fetch(cache, "1", 3600.0, fetch) is None
+
+    asyncio.run(run())
+    assert len(calls) == 2
+    assert "1" not in cache
+
+
+def test_concurrent_fetches_are_coalesced(handler):
+    cache = handler._member_info_cache
+    calls = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def slow_fetch():
+            calls.append(1)
+            await release.wait()
+            return {"card": "小猫"}
+
+        waiters = [
+            asyncio.create_task(
+                handler._cached_fetch(cache, ("1", "2"), 3600.0, slow_fetch)
+            )
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(run())
+    assert results == [{"card": "小猫"}] * 5
+    assert len(calls) == 1
+
+
+def test_invalidate_group_cache(handler):
+    group_fetch, group_calls = _counting_fetch({"group_name": "猫窝"})
+    member_fetch, member_calls = _counting_fetch({"card": "小猫"})
+
+    async def fetch_both():
+        await handler._cached_fetch(handler._group_info_cache, "1", 3600.0, group_fetch)
+        await handler._cached_fetch(
+            handler._member_info_cache, ("1", "2"), 3600.0, member_fetch
+        )
+
+    async def run():
+        await fetch_both()
+        # 只丢成员缓存，群信息还在
+        handler.invalidate_group_cache("1", "2")
+        await fetch_both()
+        assert (len(group_calls), len(member_calls)) == (1, 2)
+        # 只给群号就丢群信息缓存，成员缓存不动
+        handler.invalidate_group_cache("1")
+        await fetch_both()
+        assert (len(group_calls), len(member_calls)) == (2, 2)
+
+    asyncio.run(run())
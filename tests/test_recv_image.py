@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aicarus_protocols")
+
+try:
+    from src import recv_handler_aicarus as recv_module
+    from src.config import AdapterConfigData
+except SystemExit:
+    # 第一次运行时 config.py 会先从模板生成 config.toml 然后退出，再跑一次就好
+    pytest.skip("config.toml 刚从模板生成，请重新运行测试", allow_module_level=True)
+
+
+IMAGE_MESSAGE = [
+    {"type": "text", "data": {"text": "看图"}},
+    {
+        "type": "image",
+        "data": {"url": "http://example.invalid/a.png", "file": "a.png"},
+    },
+]
+
+
+def _make_handler(monkeypatch, fetch_base64: bool):
+    """按给定的 [image] fetch_base64 造一个接收处理器，图片下载换成假的，记下被调了几次。"""
+    calls = []
+
+    async def fake_download(url, *args, **kwargs):
+        calls.append(url)
+        return "BASE64"
+
+    monkeypatch.setattr(
+        recv_module,
+        "get_config",
+        lambda: AdapterConfigData({"image": {"fetch_base64": fetch_base64}}),
+    )
+    monkeypatch.setattr(recv_module, "get_image_base64_from_url", fake_download)
+    return recv_module.RecvHandlerAicarus(), calls
+
+
+def _image_seg(segs):
+    return next(seg for seg in segs if seg.type == "image")
+
+
+def test_image_message_with_base64_enabled(monkeypatch):
+    handler, calls = _make_handler(monkeypatch, fetch_base64=True)
+
+    # 要下载图片，同步路径不接
+    assert handler._napcat_to_aicarus_seglist_sync(IMAGE_MESSAGE) is None
+    segs = asyncio.run(handler._napcat_to_aicarus_seglist(IMAGE_MESSAGE, {}))
+
+    assert [seg.type for seg in segs] == ["text", "image"]
+    assert _image_seg(segs).data["base64"] == "BASE64"
+    assert _image_seg(segs).data["url"] == "http://example.invalid/a.png"
+    assert calls == ["http://example.invalid/a.png"]
+
+
+def test_image_message_with_base64_disabled(monkeypatch):
+    handler, calls = _make_handler(monkeypatch, fetch_base64=False)
+
+    segs = handler._napcat_to_aicarus_seglist_sync(IMAGE_MESSAGE)
+    assert segs is not None
+    assert _image_seg(segs).data["base64"] is None
+    assert _image_seg(segs).data["url"] == "http://example.invalid/a.png"
+
+    # 走 async 入口也一样，不会去下载
+    segs = asyncio.run(handler._napcat_to_aicarus_seglist(IMAGE_MESSAGE, {}))
+    assert _image_seg(segs).data["base64"] is None
+    assert calls == []